@@ -0,0 +1,254 @@
+"""
+Jugador automático: busca el mejor tiro simulando candidatos con PyMunk
+"""
+import heapq
+import math
+import time
+from collections import OrderedDict, namedtuple
+
+from billiard_game import BilliardGame
+
+# Búsqueda
+AI_TIME_BUDGET = 0.8         # Segundos máximos por decisión
+AI_GOOD_ENOUGH = 50          # Corte temprano: un tiro que emboca sin falta
+AI_SIM_ITERATIONS = 8        # Iteraciones del solver en las simulaciones (el juego usa 20)
+AI_MAX_SIM_FRAMES = 600      # Máximo de frames simulados por tiro (10 s)
+AI_MAX_LEVEL = 4             # Niveles de refinamiento grueso → fino
+AI_COARSE_STEP = math.radians(10)
+AI_TARGET_STEP = math.radians(2)
+AI_COARSE_POWERS = (8.0, 14.0, 20.0)
+AI_MIN_CUT_COS = 0.2         # Cortes de más de ~78° se consideran imposibles
+AI_POT_VALUE = 40            # Valor a partir del cual un tiro emboca (50 por bola, desempate < 10)
+AI_REFINE_MARGIN = 2.0       # Solo se refinan tiros que embocan o a este margen del mejor
+
+# Reutilización de resultados entre apuntados cercanos
+AI_ANGLE_QUANTUM = math.radians(0.2)
+AI_POWER_QUANTUM = 0.25
+AI_CACHE_SIZE = 20000
+
+Candidate = namedtuple('Candidate', ['angle', 'power', 'level', 'angle_step', 'power_step'])
+Shot = namedtuple('Shot', ['direction', 'power', 'value', 'evaluated'])
+
+
+def _segment_distance(px, py, ax, ay, bx, by):
+    """Distancia del punto P al segmento AB"""
+    abx, aby = bx - ax, by - ay
+    length_sq = abx * abx + aby * aby
+    if length_sq == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0.0, min(1.0, ((px - ax) * abx + (py - ay) * aby) / length_sq))
+    return math.hypot(px - (ax + t * abx), py - (ay + t * aby))
+
+
+class AIPlayer:
+    def __init__(self, time_budget=AI_TIME_BUDGET, good_enough=AI_GOOD_ENOUGH):
+        self.time_budget = time_budget
+        self.good_enough = good_enough
+        self._sandbox = None
+        self._cache = OrderedDict()  # {(estado, ángulo, potencia): valor}
+        self.timed_out = False       # La última búsqueda sin tiro se quedó sin tiempo (no sin tiros)
+
+    def _get_sandbox(self, game):
+        """Mesa auxiliar (sin salida por consola) donde se simulan los candidatos"""
+        if self._sandbox is None or self._sandbox.table is not game.table:
+            self._sandbox = BilliardGame(width=game.width, height=game.height, table=game.table)
+            self._sandbox.verbose = False
+            self._sandbox.space.iterations = AI_SIM_ITERATIONS
+        return self._sandbox
+
+    def choose_shot(self, game, time_budget=None):
+        """Busca el tiro con mejor puntuación dentro del presupuesto de tiempo"""
+        self.timed_out = False
+        if game.cue_ball_body is None or game.any_ball_moving():
+            return None
+
+        budget = self.time_budget if time_budget is None else time_budget
+        deadline = time.perf_counter() + budget
+        state = game.get_state()
+        state_key = tuple(sorted((n, round(x), round(y)) for n, (x, y) in state.items()))
+        sandbox = self._get_sandbox(game)
+
+        # Planificador: cola de prioridad con los candidatos pendientes. Fase 0: todos los
+        # candidatos iniciales (una simulación cada uno); fase 1: refinamientos de los prometedores.
+        # Entradas: (fase, -prioridad, orden, candidato, valor del padre)
+        queue = []
+        seq = 0
+        for prior, candidate in self._initial_candidates(game, state):
+            heapq.heappush(queue, (0, -prior, seq, candidate, None))
+            seq += 1
+
+        best = None
+        best_value = -math.inf
+        evaluated = 0
+        seen = set()
+
+        while queue and time.perf_counter() < deadline:
+            phase, _, _, candidate, parent_value = heapq.heappop(queue)
+            if phase and not self._worth_refining(parent_value, best_value):
+                continue  # El padre dejó de ser prometedor al aparecer tiros mejores
+            key = (state_key,
+                   round(candidate.angle / AI_ANGLE_QUANTUM),
+                   round(candidate.power / AI_POWER_QUANTUM))
+            if key in seen:
+                continue
+            seen.add(key)
+
+            value = self._cache.get(key)
+            if value is None:
+                value = self._simulate(sandbox, state, candidate, deadline)
+                if value is None:
+                    break  # Se acabó el tiempo en mitad de la simulación
+                self._remember(key, value)
+                evaluated += 1
+            else:
+                self._cache.move_to_end(key)
+
+            if value > best_value:
+                best_value = value
+                best = candidate
+                if best_value >= self.good_enough:
+                    break  # Corte temprano: no hace falta seguir buscando
+
+            # Refinar alrededor de los candidatos prometedores (tras evaluar todos los iniciales).
+            # La prioridad de los hijos va en la escala de `prior`: ~1 sin embocar, ~2 embocando
+            if candidate.level < AI_MAX_LEVEL and self._worth_refining(value, best_value):
+                prior = 1 + max(0.0, value) / (AI_POT_VALUE + 10)
+                for child in self._refine(candidate):
+                    heapq.heappush(queue, (1, -prior, seq, child, value))
+                    seq += 1
+
+        if best is None:
+            # Ningún candidato evaluado: no había tiros o el presupuesto no llegó ni para el primero
+            self.timed_out = time.perf_counter() >= deadline
+            return None
+        direction = (math.cos(best.angle), math.sin(best.angle))
+        return Shot(direction, best.power, best_value, evaluated)
+
+    @staticmethod
+    def _worth_refining(value, best_value):
+        """Se refina un tiro que emboca o que queda cerca del mejor encontrado"""
+        return value >= AI_POT_VALUE or value >= best_value - AI_REFINE_MARGIN
+
+    def play(self, game, time_budget=None):
+        """Elige un tiro y lo ejecuta en el juego usando la fase de potencia"""
+        shot = self.choose_shot(game, time_budget)
+        if shot is not None:
+            self.take_shot(game, shot)
+        return shot
+
+    def take_shot(self, game, shot):
+        """Ejecuta en el juego un tiro ya elegido"""
+        game.aiming = True
+        game.game_phase = 'aiming_power'
+        game.frozen_direction = shot.direction
+        game.current_power = shot.power
+        game.shoot()
+
+    def _remember(self, key, value):
+        self._cache[key] = value
+        if len(self._cache) > AI_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _initial_candidates(self, game, state):
+        """Genera los candidatos iniciales descartando tiros geométricamente imposibles"""
+        cx, cy = state[0]
+        objects = [(n, x, y) for n, (x, y) in state.items() if n != 0]
+        diag = math.hypot(game.table_length, game.table_width)
+        contact = 2 * game.ball_radius
+        candidates = []
+
+        # 1) Tiros dirigidos: bola fantasma para cada pareja bola/tronera
+        for number, bx, by in objects:
+            for pocket in game.pockets:
+                px, py = pocket['pos']
+                to_pocket = math.hypot(px - bx, py - by)
+                if to_pocket == 0:
+                    continue
+                ux, uy = (px - bx) / to_pocket, (py - by) / to_pocket
+                gx, gy = bx - ux * contact, by - uy * contact
+                to_ghost = math.hypot(gx - cx, gy - cy)
+                if to_ghost < 1:
+                    continue
+                cut_cos = ((gx - cx) * ux + (gy - cy) * uy) / to_ghost
+                if cut_cos < AI_MIN_CUT_COS:
+                    continue
+
+                blocked = False
+                for other, ox, oy in objects:
+                    if other == number:
+                        continue
+                    if (_segment_distance(ox, oy, cx, cy, gx, gy) < contact or
+                            _segment_distance(ox, oy, bx, by, px, py) < contact):
+                        blocked = True
+                        break
+                if blocked:
+                    continue
+
+                angle = math.atan2(gy - cy, gx - cx)
+                power = max(4.0, min(4.0 + (to_ghost + to_pocket) / 60.0, 20.0))
+                prior = 1 + cut_cos / (1 + (to_ghost + to_pocket) / diag)
+                for factor in (1.0, 1.25, 0.8):
+                    candidates.append((prior, Candidate(angle, min(power * factor, 20.0), 1,
+                                                        AI_TARGET_STEP, 2.0)))
+                    prior -= 0.01
+
+        # 2) Rejilla gruesa de ángulos: solo los que golpean alguna bola directamente
+        steps = int(round(2 * math.pi / AI_COARSE_STEP))
+        for i in range(steps):
+            angle = i * AI_COARSE_STEP
+            dx, dy = math.cos(angle), math.sin(angle)
+            hits = False
+            for _, ox, oy in objects:
+                along = (ox - cx) * dx + (oy - cy) * dy
+                if along > 0 and abs((ox - cx) * dy - (oy - cy) * dx) < contact:
+                    hits = True
+                    break
+            if not hits:
+                continue
+            for power in AI_COARSE_POWERS:
+                candidates.append((0.5, Candidate(angle, power, 0, AI_COARSE_STEP, 3.0)))
+
+        return candidates
+
+    def _refine(self, candidate):
+        """Vecinos más finos de un candidato (mitad de paso en ángulo y potencia)"""
+        angle_step = candidate.angle_step / 2
+        power_step = candidate.power_step / 2
+        level = candidate.level + 1
+        children = []
+        for d_angle in (-angle_step, angle_step):
+            children.append(Candidate(candidate.angle + d_angle, candidate.power, level, angle_step, power_step))
+        for d_power in (-power_step, power_step):
+            power = candidate.power + d_power
+            if 1.0 < power <= 20.0:
+                children.append(Candidate(candidate.angle, power, level, angle_step, power_step))
+        return children
+
+    def _simulate(self, sandbox, state, candidate, deadline):
+        """Simula un tiro en la mesa auxiliar y devuelve su puntuación (None si se agota el tiempo)"""
+        baseline = 1000
+        sandbox.set_state(state)
+        sandbox.score = baseline
+        sandbox.apply_shot(math.cos(candidate.angle), math.sin(candidate.angle), candidate.power)
+
+        for _ in range(AI_MAX_SIM_FRAMES):
+            sandbox.step_frame()
+            if not sandbox.any_ball_moving():
+                break
+            if time.perf_counter() > deadline:
+                return None
+
+        # Puntos ganados (bolas embocadas menos falta por meter la blanca)
+        value = sandbox.score - baseline
+
+        # Desempate posicional: dejar alguna bola cerca de una tronera
+        diag = math.hypot(sandbox.table_length, sandbox.table_width)
+        nearest = diag
+        for number, body in sandbox.ball_bodies.items():
+            if number == 0:
+                continue
+            bx, by = body.position
+            for pocket in sandbox.pockets:
+                px, py = pocket['pos']
+                nearest = min(nearest, math.hypot(bx - px, by - py))
+        return value + 10 * (1 - nearest / diag)
@@ -0,0 +1,95 @@
+"""
+Benchmark de escalado: coste por frame (física, troneras, dibujo) según el número de bolas
+
+Uso: python benchmark_scaling.py [--frames 300] [--budget-ms 16.7]
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from billiard_game import BilliardGame
+from table_config import TABLES, SIX_POCKETS, compile_table, load_table
+
+
+def _big_table(rows):
+    """Mesa grande sintética con un triángulo de `rows` filas (rows*(rows+1)/2 bolas)"""
+    count = rows * (rows + 1) // 2
+    config = dict(TABLES['pool'])
+    config.update({
+        'size': (1800, 900),
+        'pockets': SIX_POCKETS,
+        'show_numbers': True,
+        'cue_spot': (0.2, 0.5),
+        'cue_respawn': (0.2, 0.5),
+        'rack': [{'pattern': 'triangle', 'apex': (0.55, 0.5), 'direction': (1, 0), 'rows': rows,
+                  'colors': [(40 + (i * 37) % 200, 80, 200 - (i * 53) % 150) for i in range(count)]}],
+    })
+    return compile_table(f'grande_{count}', config)
+
+
+def measure(table, frames):
+    """Rompe el triángulo a máxima potencia y mide cada etapa durante `frames` frames"""
+    game = BilliardGame(width=1200, height=800, table=table)
+    game.verbose = False
+    frame = np.zeros((game.height, game.width, 3), dtype=np.uint8)
+
+    # Tiro a la bola más cercana del triángulo
+    cx, cy = game.table.cue_spot
+    _, bx, by, _ = min(game.table.balls, key=lambda ball: math.hypot(ball[1] - cx, ball[2] - cy))
+    distance = math.hypot(bx - cx, by - cy)
+    game.apply_shot((bx - cx) / distance, (by - cy) / distance, 20.0)
+
+    # Las troneras se miden dentro de update() (la pasada que hace el juego en cada frame)
+    pocket_time = 0.0
+    check_pockets = game.check_pockets
+
+    def timed_check_pockets():
+        nonlocal pocket_time
+        start = time.perf_counter()
+        check_pockets()
+        pocket_time += time.perf_counter() - start
+
+    game.check_pockets = timed_check_pockets
+
+    step_time = draw_time = 0.0
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        game.step_frame()
+        t1 = time.perf_counter()
+        game.draw(frame)
+        t2 = time.perf_counter()
+        step_time += t1 - t0
+        draw_time += t2 - t1
+
+    # La física se informa sin las troneras; total = física + troneras + dibujo es un frame del juego
+    to_ms = 1000.0 / frames
+    return (len(game.table.balls) + 1, (step_time - pocket_time) * to_ms, pocket_time * to_ms,
+            draw_time * to_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escalado por número de bolas")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--budget-ms', type=float, default=1000 / 60,
+                        help="Presupuesto por frame (física + troneras + dibujo) para la mesa de snooker")
+    args = parser.parse_args()
+
+    tables = [load_table(name) for name in TABLES] + [_big_table(rows) for rows in (8, 10, 14)]
+    print(f"{'mesa':<12}{'bolas':>6}{'física ms':>11}{'troneras ms':>13}{'dibujo ms':>11}{'total ms':>10}")
+    over_budget = []
+    for table in tables:
+        balls, step_ms, pocket_ms, draw_ms = measure(table, args.frames)
+        total = step_ms + pocket_ms + draw_ms
+        print(f"{table.name:<12}{balls:>6}{step_ms:>11.3f}{pocket_ms:>13.3f}{draw_ms:>11.3f}{total:>10.3f}")
+        if table.name == 'snooker' and total > args.budget_ms:
+            over_budget.append(table.name)
+
+    if over_budget:
+        print(f"FUERA DE PRESUPUESTO ({args.budget_ms:.1f} ms): {', '.join(over_budget)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
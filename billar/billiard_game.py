@@ -1,14 +1,27 @@
 import cv2
 import numpy as np
 import math
+import logging
 import pymunk
 from pymunk_config import *
+from game_log import get_logger, log_event
+from table_config import load_table, TableSpec, DEFAULT_TABLE
+
+logger = get_logger('game')
+
+# Capas estáticas (solo lectura) compartidas por las partidas con la misma mesa y tamaño
+_BACKGROUNDS = {}
 
 class BilliardGame:
-    def __init__(self, width=1200, height=800):
+    def __init__(self, width=1200, height=800, table=DEFAULT_TABLE):
         self.width = width
         self.height = height
         
+        # Mesa y reglas declarativas, compiladas una vez (ver table_config.py)
+        self.table = table if isinstance(table, TableSpec) else load_table(table)
+        self.table_name = self.table.name
+        self.ball_radius = self.table.ball_radius
+        
         # Definir mesa en perspectiva
         self.table_3d = {
             'near_left': (150, 550),
@@ -17,19 +30,47 @@ class BilliardGame:
             'far_right': (950, 150)
         }
         
+        # Mesa plana rectangular donde corre la física (unidades de mesa)
+        # x: de izquierda a derecha, y: de la banda del fondo (0) a la cercana (table_width)
+        self.table_length = self.table.length
+        self.table_width = self.table.width
+        
+        # Homografía precalculada mesa plana → pantalla y su inversa (pantalla → mesa)
+        table_corners = np.float32([
+            (0, 0), (self.table_length, 0),
+            (self.table_length, self.table_width), (0, self.table_width)
+        ])
+        screen_corners = np.float32([
+            self.table_3d['far_left'], self.table_3d['far_right'],
+            self.table_3d['near_right'], self.table_3d['near_left']
+        ])
+        self.homography = cv2.getPerspectiveTransform(table_corners, screen_corners)
+        self.inverse_homography = np.linalg.inv(self.homography)
+        # Coeficientes como tuplas para mapear puntos sueltos sin crear arrays
+        self._h = tuple(float(v) for v in self.homography.ravel())
+        self._h_inv = tuple(float(v) for v in self.inverse_homography.ravel())
+        
         # PYMUNK: Crear espacio de física
         self.space = pymunk.Space()
         self.space.gravity = GRAVITY
         self.space.damping = 0.90  # ANTES 0.88 → AHORA 0.90 (equilibrio velocidad/fricción)
         self.space.iterations = 20  # ANTES SIMULATION_ITERATIONS → AHORA 20 (precisión física)
+        if len(self.table.balls) >= SPATIAL_HASH_MIN_BALLS:
+            # Muchas bolas del mismo tamaño: el hash espacial escala mejor que el árbol por defecto
+            self.space.use_spatial_hash(self.ball_radius * 2, len(self.table.balls) * 4)
         
         # Diccionarios para bolas PyMunk
         self.ball_bodies = {}  # {number: body}
         self.ball_shapes = {}  # {number: shape}
         self.ball_colors = {}  # {number: color}
+        self.ball_palette = {}  # {number: color} incluye bolas ya embocadas
+        
+        # Registro de eventos (desactivar en simulaciones internas)
+        self.verbose = True
         
         self.pockets = []
         self.init_pockets()
+        self._background = None  # Capa estática cacheada (ver draw_background)
         
         # Referencias para la bola blanca
         self.cue_ball_body = None
@@ -48,46 +89,77 @@ class BilliardGame:
         self.game_phase = 'idle'          # 'idle', 'aiming_direction', 'aiming_power'
         self.frozen_direction = None      # (dx, dy) unitario
         self.current_power = 0.0          # potencia en fase 2
-        self.power_origin = None          # (x, y) en pantalla, SIEMPRE centro de la bola blanca
+        self.power_origin = None          # (x, y) en la mesa, SIEMPRE centro de la bola blanca
+        
+        # Instante de captura del frame de cámara que disparó el último tiro (medición de latencia)
+        self.shot_input_time = None
         
         # Crear paredes y bolas con PyMunk
         self.create_walls()
         self.initialize_balls()
     
     def init_pockets(self):
-        """Inicializa las troneras en las esquinas y centros"""
-        self.pockets = [
-            {'pos': self.table_3d['near_left'], 'radius': 40},   # ANTES 35 → 40
-            {'pos': self.table_3d['near_right'], 'radius': 40},  # ANTES 35 → 40
-            {'pos': self.table_3d['far_left'], 'radius': 35},    # ANTES 30 → 35
-            {'pos': self.table_3d['far_right'], 'radius': 35},   # ANTES 30 → 35
-        ]
-        
-        near_center = (
-            (self.table_3d['near_left'][0] + self.table_3d['near_right'][0]) // 2,
-            (self.table_3d['near_left'][1] + self.table_3d['near_right'][1]) // 2
-        )
-        far_center = (
-            (self.table_3d['far_left'][0] + self.table_3d['far_right'][0]) // 2,
-            (self.table_3d['far_left'][1] + self.table_3d['far_right'][1]) // 2
-        )
-        
-        self.pockets.append({'pos': near_center, 'radius': 38})  # ANTES 32 → 38
-        self.pockets.append({'pos': far_center, 'radius': 33})   # ANTES 28 → 33
+        """Inicializa las troneras de la mesa configurada (en coordenadas de mesa)"""
+        self.pockets = [dict(pocket) for pocket in self.table.pockets]
+        
+        # Posición y radio en pantalla precalculados (las troneras no se mueven)
+        centers = self.table.pocket_centers
+        screen_radii = self.screen_radii(centers, [pocket['radius'] for pocket in self.pockets])
+        for pocket, center, radius in zip(self.pockets, self.table_to_screen(centers), screen_radii):
+            pocket['screen_pos'] = (int(center[0]), int(center[1]))
+            pocket['screen_radius'] = int(radius)
+    
+    def table_to_screen(self, points):
+        """Mapea en lote puntos de la mesa (N, 2) a coordenadas de pantalla (N, 2)"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        h = self.homography
+        projected = points @ h[:, :2].T + h[:, 2]
+        return projected[:, :2] / projected[:, 2:3]
+    
+    def screen_to_table(self, points):
+        """Mapea en lote puntos de pantalla (N, 2) a coordenadas de la mesa (N, 2)"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        h = self.inverse_homography
+        projected = points @ h[:, :2].T + h[:, 2]
+        return projected[:, :2] / projected[:, 2:3]
+    
+    def table_point_to_screen(self, x, y):
+        """Mapea un único punto de la mesa a píxeles de pantalla (enteros, para OpenCV)"""
+        h = self._h
+        w = h[6] * x + h[7] * y + h[8]
+        return int((h[0] * x + h[1] * y + h[2]) / w), int((h[3] * x + h[4] * y + h[5]) / w)
+    
+    def screen_point_to_table(self, x, y):
+        """Mapea un único punto de pantalla (p. ej. la mano) a coordenadas de la mesa"""
+        h = self._h_inv
+        w = h[6] * x + h[7] * y + h[8]
+        return (h[0] * x + h[1] * y + h[2]) / w, (h[3] * x + h[4] * y + h[5]) / w
+    
+    def screen_radii(self, centers, radii):
+        """Radio aparente en pantalla de círculos de la mesa (según su profundidad)"""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        edges = centers.copy()
+        edges[:, 0] += radii
+        delta = self.table_to_screen(edges) - self.table_to_screen(centers)
+        return np.hypot(delta[:, 0], delta[:, 1])
     
 
     def create_walls(self):
         """Crea las paredes de la mesa con PyMunk"""
         wall_thickness = 10
+        near_left = (0, self.table_width)
+        near_right = (self.table_length, self.table_width)
+        far_left = (0, 0)
+        far_right = (self.table_length, 0)
         walls = [
             # Pared izquierda
-            (self.table_3d['near_left'], self.table_3d['far_left']),
+            (near_left, far_left),
             # Pared derecha
-            (self.table_3d['near_right'], self.table_3d['far_right']),
-            # Pared superior
-            (self.table_3d['far_left'], self.table_3d['far_right']),
-            # Pared inferior
-            (self.table_3d['near_left'], self.table_3d['near_right']),
+            (near_right, far_right),
+            # Pared superior (fondo)
+            (far_left, far_right),
+            # Pared inferior (cercana)
+            (near_left, near_right),
         ]
         
         for start, end in walls:
@@ -100,12 +172,12 @@ class BilliardGame:
     def create_ball(self, x, y, number, color, is_cue=False):
         """Crea una bola con PyMunk"""
         # Crear cuerpo con momento de inercia para rotación
-        moment = pymunk.moment_for_circle(BALL_MASS, 0, BALL_RADIUS)
+        moment = pymunk.moment_for_circle(BALL_MASS, 0, self.ball_radius)
         body = pymunk.Body(BALL_MASS, moment)
         body.position = x, y
         
         # Crear forma de colisión
-        shape = pymunk.Circle(body, BALL_RADIUS)
+        shape = pymunk.Circle(body, self.ball_radius)
         shape.elasticity = 1  # ANTES 0.75 → Mayor rebote/transferencia de energía
         shape.friction = 0.9  # ANTES 1.1 → Menos agarre = más velocidad
         
@@ -116,6 +188,7 @@ class BilliardGame:
         self.ball_bodies[number] = body
         self.ball_shapes[number] = shape
         self.ball_colors[number] = color
+        self.ball_palette[number] = color
         
         if is_cue:
             self.cue_ball_body = body
@@ -123,58 +196,22 @@ class BilliardGame:
         return body
     
     def initialize_balls(self):
-        """Inicializa todas las bolas en formación de triángulo"""
+        """Coloca la bola blanca y el resto de bolas según la mesa configurada"""
         # Bola blanca
-        cue_x, cue_y = self.convert_3d_to_2d(0.2, 0.5)
+        cue_x, cue_y = self.table.cue_spot
         self.create_ball(cue_x, cue_y, 0, (255, 255, 255), is_cue=True)
         
-        # Colores para las bolas
-        colors = [
-            (255, 200, 0),   # 1 - Amarillo
-            (0, 100, 200),   # 2 - Azul
-            (255, 50, 50),   # 3 - Rojo
-            (150, 50, 150),  # 4 - Púrpura
-            (255, 140, 0),   # 5 - Naranja
-            (0, 150, 50),    # 6 - Verde
-            (139, 69, 19),   # 7 - Marrón
-            (0, 0, 0),       # 8 - Negro
-            (255, 200, 0),   # 9 - Amarillo rayado
-            (0, 100, 200),   # 10 - Azul rayado
-            (255, 50, 50),   # 11 - Rojo rayado
-            (150, 50, 150),  # 12 - Púrpura rayado
-            (255, 140, 0),   # 13 - Naranja rayado
-            (0, 150, 50),    # 14 - Verde rayado
-        ]
-        
-        # Formar triángulo
-        start_3d_x = 0.7
-        start_3d_y = 0.5
-        spacing = 0.04
-        
-        ball_num = 1
-        for row in range(5):
-            for col in range(row + 1):
-                x_3d = start_3d_x + row * spacing
-                y_3d = start_3d_y + (col - row/2) * spacing
-                
-                x, y = self.convert_3d_to_2d(x_3d, y_3d)
-                
-                if ball_num <= len(colors):
-                    self.create_ball(x, y, ball_num, colors[ball_num-1])
-                    ball_num += 1
+        # Bolas de la colocación inicial (triángulo, puntos...) ya precalculadas
+        for number, x, y, color in self.table.balls:
+            self.create_ball(x, y, number, color)
+    
+    def norm_to_table(self, norm_x, norm_y):
+        """Convierte coordenadas normalizadas (0-1, profundidad y lateral) a coordenadas de mesa"""
+        return norm_y * self.table_length, (1 - norm_x) * self.table_width
     
     def convert_3d_to_2d(self, norm_x, norm_y):
         """Convierte coordenadas normalizadas (0-1) a coordenadas de pantalla con perspectiva"""
-        near_left = np.array(self.table_3d['near_left'])
-        near_right = np.array(self.table_3d['near_right'])
-        far_left = np.array(self.table_3d['far_left'])
-        far_right = np.array(self.table_3d['far_right'])
-        
-        near_point = near_left + norm_y * (near_right - near_left)
-        far_point = far_left + norm_y * (far_right - far_left)
-        point = near_point + norm_x * (far_point - near_point)
-        
-        return int(point[0]), int(point[1])
+        return self.table_point_to_screen(*self.norm_to_table(norm_x, norm_y))
     
     def start_aiming(self, x, y):
         """Inicia el proceso de apuntar (NO TOCAR - usado por gestos)"""
@@ -188,15 +225,18 @@ class BilliardGame:
                 body.angular_velocity *= 0.1
             
             cue_x, cue_y = self.cue_ball_body.position
-            # origen visual y geométrico = centro bola blanca
-            self.aim_start = (int(cue_x), int(cue_y))
-            self.aim_end = (int(x), int(y))
+            # origen visual y geométrico = centro bola blanca (coordenadas de mesa)
+            self.aim_start = (float(cue_x), float(cue_y))
+            self.aim_end = self.screen_point_to_table(x, y)
     
     def update_aim(self, x, y):
         """Actualiza la dirección de apunte (NO TOCAR - usado por gestos)"""
         if not self.aiming:
             return
 
+        # La mano llega en píxeles de pantalla: pasar a la mesa plana
+        x, y = self.screen_point_to_table(x, y)
+
         if self.game_phase == 'aiming_direction':
             # FASE 1: solo dirección, origen = bola blanca
             self.aim_end = (x, y)
@@ -226,7 +266,7 @@ class BilliardGame:
 
         # vector unitario desde la bola blanca hacia aim_end
         self.frozen_direction = (dx / distance, dy / distance)
-        self.power_origin = (int(origin[0]), int(origin[1]))
+        self.power_origin = origin
         self.current_power = 0.0
         
         # ✅ FRENO al congelar dirección
@@ -235,10 +275,10 @@ class BilliardGame:
 
         # fijar aim_start / aim_end para que la línea se vea en la dirección congelada
         reference_dist = 250
-        self.aim_start = (int(origin[0]), int(origin[1]))
+        self.aim_start = origin
         self.aim_end = (
-            int(origin[0] + self.frozen_direction[0] * reference_dist),
-            int(origin[1] + self.frozen_direction[1] * reference_dist)
+            origin[0] + self.frozen_direction[0] * reference_dist,
+            origin[1] + self.frozen_direction[1] * reference_dist
         )
 
         self.game_phase = 'aiming_power'
@@ -246,15 +286,20 @@ class BilliardGame:
     def cancel_power_phase(self):
         """Volver de FASE 2 → FASE 1 (desactivar potencia, volver a dirección)"""
         if self.game_phase == 'aiming_power':
-            print("🔄 Cancelando potencia → Volviendo a dirección")
+            if self.verbose:
+                log_event(logger, 'power_cancelled')
             self.game_phase = 'aiming_direction'
             self.frozen_direction = None
             self.current_power = 0.0
             self.power_origin = None
             # Mantener aim_start y aim_end para que el usuario vea dónde estaba
     
-    def shoot(self):
-        """Ejecuta el tiro con PyMunk"""
+    def shoot(self, input_time=None):
+        """
+        Ejecuta el tiro con PyMunk.
+        
+        input_time: instante (perf_counter) de captura del frame con el gesto que dispara
+        """
         if not self.aiming or not self.cue_ball_body:
             return
 
@@ -278,19 +323,25 @@ class BilliardGame:
             return
 
         if power > 1.0:
-            velocity_scale = 85  # ANTES 75 → 85 (más potencia)
-            
-            # ✅ BOLA BLANCA con potencia completa
-            self.cue_ball_body.velocity = (
-                direction_x * power * velocity_scale,
-                direction_y * power * velocity_scale
-            )
-            self.cue_ball_body.angular_velocity = (power * velocity_scale * 0.6) / BALL_RADIUS
+            self.apply_shot(direction_x, direction_y, power)
+            self.shot_input_time = input_time
             
-            print(f"[DISPARO EXITOSO] dirección=({direction_x:.2f}, {direction_y:.2f}), potencia={power:.1f}")
+            if self.verbose:
+                log_event(logger, 'shot', dx=direction_x, dy=direction_y, power=power)
 
         self.reset_aim()
     
+    def apply_shot(self, direction_x, direction_y, power):
+        """Aplica la velocidad del tiro a la bola blanca (sin pasar por las fases)"""
+        velocity_scale = 85  # ANTES 75 → 85 (más potencia)
+        
+        # ✅ BOLA BLANCA con potencia completa
+        self.cue_ball_body.velocity = (
+            direction_x * power * velocity_scale,
+            direction_y * power * velocity_scale
+        )
+        self.cue_ball_body.angular_velocity = (power * velocity_scale * 0.6) / self.ball_radius
+    
     def reset_aim(self):
         """Resetea todas las variables de apuntado"""
         self.aiming = False
@@ -336,61 +387,60 @@ class BilliardGame:
                 body.velocity = (0, 0)
                 body.angular_velocity = 0
     
+    def step_frame(self):
+        """Avanza un frame completo de simulación (el mismo paso que usa el bucle principal)"""
+        # Subpasos iguales: Chipmunk escala los impulsos cacheados de los contactos por
+        # dt/dt_anterior, y alternar pasos de 1/60 y 1/120 los duplicaba (energía de la nada)
+        for _ in range(round(SIMULATION_DT / PHYSICS_DT)):
+            self.space.step(PHYSICS_DT)
+        self.update_physics()  # Detener bolas lentas
+        self.update()
+    
     def update(self):
         """Actualiza el estado del juego"""
         # Avanzar simulación física
-        self.space.step(1/120.0)      # 120 Hz de física
+        self.space.step(PHYSICS_DT)   # 120 Hz de física
         self.update_physics()         # Frenado personalizado
         self.check_pockets()          # Detección de troneras
     
     def check_pockets(self):
-        """Verifica si las bolas caen en las troneras (múltiples por frame, depurable)"""
+        """Verifica si las bolas caen en las troneras (todas las bolas contra todas las troneras a la vez)"""
+        if not self.ball_bodies:
+            return
         balls_to_remove = []
 
-        # 1) Copia de claves para no tocar el diccionario mientras iteramos
+        # 1) Distancias al cuadrado bola-tronera en una sola operación (N x P)
         active_numbers = list(self.ball_bodies.keys())
-        # DEBUG:
-        # print(f"[DEBUG] check_pockets: bolas activas = {active_numbers}")
-
-        for number in active_numbers:
-            # Puede haberse eliminado en este mismo frame
-            if number not in self.ball_bodies:
-                continue
+        positions = np.array([self.ball_bodies[number].position for number in active_numbers], dtype=np.float64)
+        delta = positions[:, None, :] - self.table.pocket_centers[None, :, :]
+        dist_sq = np.einsum('npk,npk->np', delta, delta)
+        inside = dist_sq < self.table.pocket_radii_sq
 
+        # Solo las bolas que están dentro de alguna tronera pasan a Python
+        for index in np.flatnonzero(inside.any(axis=1)):
+            number = active_numbers[index]
             body = self.ball_bodies[number]
-            bx, by = float(body.position.x), float(body.position.y)
-
-            for pocket in self.pockets:
-                px, py = pocket['pos']
-                distance = math.hypot(bx - px, by - py)
-
-                # Radios efectivos generosos (ajusta si hace falta)
-                if number == 0:
-                    effective_radius = pocket['radius']  # Blanca
-                else:
-                    effective_radius = pocket['radius']  # Colores igual de fácil
-
-                # DEBUG:
-                # print(f"[DEBUG] bola {number}: dist={distance:.1f}, eff={effective_radius:.1f}")
+            pocket_index = int(inside[index].argmax())  # Primera tronera que la contiene
 
-                if distance < effective_radius:
-                    print(f"🎱 BOLA {number} CAE EN TRONERA (dist={distance:.1f} < {effective_radius:.1f})")
+            if self.verbose:
+                log_event(logger, 'ball_pocketed', ball=number,
+                          distance=math.sqrt(dist_sq[index, pocket_index]),
+                          radius=float(self.pockets[pocket_index]['radius']))
 
-                    if number == 0:
-                        # Bola blanca: reponer sin eliminar
-                        self.score = max(0, self.score - 50)
-                        cue_x, cue_y = self.convert_3d_to_2d(0.3, 0.5)
-                        body.position = (cue_x, cue_y)
-                        body.velocity = (0, 0)
-                        body.angular_velocity = 0
-                    else:
-                        # Marcar bola de color para eliminar
-                        balls_to_remove.append(number)
-                    break  # Salir del bucle de pockets para esta bola
+            if number == 0:
+                # Bola blanca: reponer sin eliminar
+                self.score = max(0, self.score - 50)
+                cue_x, cue_y = self.table.cue_respawn
+                body.position = (cue_x, cue_y)
+                body.velocity = (0, 0)
+                body.angular_velocity = 0
+            else:
+                # Marcar bola de color para eliminar
+                balls_to_remove.append(number)
 
         # 2) Eliminar bolas marcadas FUERA del bucle principal
-        if balls_to_remove:
-            print(f"[DEBUG] Eliminando bolas: {balls_to_remove}")
+        if balls_to_remove and self.verbose:
+            log_event(logger, 'removing_balls', logging.DEBUG, balls=balls_to_remove)
 
         for number in balls_to_remove:
             body = self.ball_bodies.pop(number, None)
@@ -399,10 +449,11 @@ class BilliardGame:
                 self.space.remove(body, shape)
             self.ball_colors.pop(number, None)
             self.score += 50
-            print(f"[DEBUG] Bola {number} eliminada. Score = {self.score}")
+            if self.verbose:
+                log_event(logger, 'ball_removed', logging.DEBUG, ball=number, score=self.score)
     
-    def draw(self, frame):
-        """Dibuja el juego en el frame"""
+    def draw_background(self, frame):
+        """Dibuja la parte estática: fondo, mesa, troneras e instrucciones"""
         frame[:] = (40, 40, 40)
         
         # Dibujar mesa
@@ -416,43 +467,80 @@ class BilliardGame:
         cv2.fillPoly(frame, [table_points], (20, 100, 40))
         cv2.polylines(frame, [table_points], True, (139, 69, 19), 15)
         
-        # Dibujar troneras
+        # Dibujar troneras (posición en pantalla precalculada)
         for pocket in self.pockets:
             # Tronera negra
-            cv2.circle(frame, pocket['pos'], pocket['radius'], (0, 0, 0), -1)
+            cv2.circle(frame, pocket['screen_pos'], pocket['screen_radius'], (0, 0, 0), -1)
             # Borde grueso naranja/café
-            cv2.circle(frame, pocket['pos'], pocket['radius'] + 3, (100, 50, 0), 4)
+            cv2.circle(frame, pocket['screen_pos'], pocket['screen_radius'] + 3, (100, 50, 0), 4)
+        
+        instructions = [
+            "MANO IZQ ABIERTA: Mostrar vector de apunte",
+            "MANO IZQ CERRADA: Marca inicio del tiro",
+            "MANO DER: Marca dirección y dispara",
+            "R: Reiniciar | Q: Salir"
+        ]
+        
+        y_pos = self.height - 100
+        for instruction in instructions:
+            cv2.putText(frame, instruction, (50, y_pos), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+            y_pos += 25
+        
+        return frame
+    
+    def shared_background(self, shape):
+        """Capa estática de esta mesa, dibujada una vez por proceso aunque haya varias partidas"""
+        key = (self.table_name, shape)
+        background = _BACKGROUNDS.get(key)
+        if background is None:
+            background = self.draw_background(np.empty(shape, dtype=np.uint8))
+            background.flags.writeable = False
+            _BACKGROUNDS[key] = background
+        return background
+    
+    def draw(self, frame):
+        """Dibuja el juego en el frame"""
+        # Fondo estático dibujado una sola vez y copiado en cada frame
+        if self._background is None or self._background.shape != frame.shape:
+            self._background = self.shared_background(frame.shape)
+        np.copyto(frame, self._background)
         
         # VECTOR PREVIEW (mano izq abierta) - NO TOCAR
         if self.show_aim_vector and self.aim_vector_start and self.aim_vector_end:
             azul_claro = (255, 200, 100)
-            self.draw_dashed_line(frame, self.aim_vector_start, self.aim_vector_end, 
+            vector_start = self.table_point_to_screen(*self.aim_vector_start)
+            vector_end = self.table_point_to_screen(*self.aim_vector_end)
+            self.draw_dashed_line(frame, vector_start, vector_end, 
                                  azul_claro, 4, 15)
-            cv2.circle(frame, self.aim_vector_start, 10, azul_claro, -1)
-            cv2.circle(frame, self.aim_vector_start, 10, (255, 255, 255), 2)
-            self.draw_arrow(frame, self.aim_vector_start, self.aim_vector_end, azul_claro, 4)
+            cv2.circle(frame, vector_start, 10, azul_claro, -1)
+            cv2.circle(frame, vector_start, 10, (255, 255, 255), 2)
+            self.draw_arrow(frame, vector_start, vector_end, azul_claro, 4)
         
         # SISTEMA DE DOS FASES
         if self.aiming and self.aim_start and self.aim_end:
+            aim_start = self.table_point_to_screen(*self.aim_start)
+            aim_end = self.table_point_to_screen(*self.aim_end)
             if self.game_phase == 'aiming_direction':
                 # FASE 1: Línea AZUL punteada desde bola blanca
                 azul = (255, 150, 0)
-                self.draw_dashed_line(frame, self.aim_start, self.aim_end, azul, 4, 15)
-                cv2.circle(frame, self.aim_start, 10, azul, -1)
-                cv2.circle(frame, self.aim_start, 10, (255, 255, 255), 2)
-                cv2.circle(frame, self.aim_end, 8, (255, 200, 100), -1)
-                self.draw_arrow(frame, self.aim_start, self.aim_end, azul, 4)
+                self.draw_dashed_line(frame, aim_start, aim_end, azul, 4, 15)
+                cv2.circle(frame, aim_start, 10, azul, -1)
+                cv2.circle(frame, aim_start, 10, (255, 255, 255), 2)
+                cv2.circle(frame, aim_end, 8, (255, 200, 100), -1)
+                self.draw_arrow(frame, aim_start, aim_end, azul, 4)
                 
             elif self.game_phase == 'aiming_power':
                 # FASE 2: Línea ROJA sólida desde power_origin (bola blanca)
                 rojo = (0, 0, 255)
                 if self.power_origin:
-                    cv2.line(frame, self.power_origin, self.aim_end, rojo, 5)
-                    cv2.circle(frame, self.power_origin, 10, rojo, -1)
-                    cv2.circle(frame, self.power_origin, 10, (255, 255, 255), 2)
-                    cv2.circle(frame, self.aim_end, 10, (255, 150, 0), -1)
-                    cv2.circle(frame, self.aim_end, 10, (255, 255, 255), 2)
-                    self.draw_arrow(frame, self.power_origin, self.aim_end, rojo, 5)
+                    power_origin = self.table_point_to_screen(*self.power_origin)
+                    cv2.line(frame, power_origin, aim_end, rojo, 5)
+                    cv2.circle(frame, power_origin, 10, rojo, -1)
+                    cv2.circle(frame, power_origin, 10, (255, 255, 255), 2)
+                    cv2.circle(frame, aim_end, 10, (255, 150, 0), -1)
+                    cv2.circle(frame, aim_end, 10, (255, 255, 255), 2)
+                    self.draw_arrow(frame, power_origin, aim_end, rojo, 5)
                 
                 # BARRA DE POTENCIA - Solo en FASE 2
                 power = int(self.current_power)
@@ -494,26 +582,31 @@ class BilliardGame:
                 cv2.putText(frame, text, (text_x, text_y), 
                            cv2.FONT_HERSHEY_DUPLEX, 1.2, bar_color, 3)
         
-        # PYMUNK: Dibujar bolas desde bodies
-        for number, body in self.ball_bodies.items():
-            x, y = int(body.position.x), int(body.position.y)
+        # PYMUNK: Dibujar bolas desde bodies (mapeo mesa → pantalla de todas a la vez)
+        numbers = list(self.ball_bodies.keys())
+        centers = np.array([tuple(self.ball_bodies[n].position) for n in numbers], dtype=np.float64)
+        screen_centers = self.table_to_screen(centers).astype(np.int32)
+        screen_radii = self.screen_radii(centers, self.ball_radius).astype(np.int32)
+        
+        for number, (x, y), radius in zip(numbers, screen_centers.tolist(), screen_radii.tolist()):
+            body = self.ball_bodies[number]
             color = self.ball_colors[number]
             
             # Sombra
-            cv2.circle(frame, (x + 3, y + 3), BALL_RADIUS, (0, 0, 0), -1)
+            cv2.circle(frame, (x + 3, y + 3), radius, (0, 0, 0), -1)
             
             # Bola
-            cv2.circle(frame, (x, y), BALL_RADIUS, color, -1)
-            cv2.circle(frame, (x, y), BALL_RADIUS, (255, 255, 255), 2)
+            cv2.circle(frame, (x, y), radius, color, -1)
+            cv2.circle(frame, (x, y), radius, (255, 255, 255), 2)
             
             # Línea de rotación (visual del spin)
             angle = body.angle
-            end_x = int(x + BALL_RADIUS * 0.7 * math.cos(angle))
-            end_y = int(y + BALL_RADIUS * 0.7 * math.sin(angle))
+            end_x = int(x + radius * 0.7 * math.cos(angle))
+            end_y = int(y + radius * 0.7 * math.sin(angle))
             cv2.line(frame, (x, y), (end_x, end_y), (255, 255, 255), 2)
             
-            # Número en la bola
-            if number != 0:
+            # Número en la bola (según la mesa: en snooker no se numeran)
+            if number != 0 and self.table.show_numbers:
                 cv2.putText(frame, str(number), (x - 8, y + 6), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
         
@@ -521,19 +614,6 @@ class BilliardGame:
         cv2.putText(frame, f"Score: {self.score}", (50, 50), 
                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
         
-        instructions = [
-            "MANO IZQ ABIERTA: Mostrar vector de apunte",
-            "MANO IZQ CERRADA: Marca inicio del tiro",
-            "MANO DER: Marca dirección y dispara",
-            "R: Reiniciar | Q: Salir"
-        ]
-        
-        y_pos = self.height - 100
-        for instruction in instructions:
-            cv2.putText(frame, instruction, (50, y_pos), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
-            y_pos += 25
-        
         return frame
     
     def draw_dashed_line(self, frame, start, end, color, thickness, dash_length):
@@ -571,9 +651,13 @@ class BilliardGame:
         if start_pos and end_pos and not self.any_ball_moving():
             self.show_aim_vector = True
             
+            # Las manos llegan en píxeles de pantalla: pasar a la mesa plana
+            start_pos = self.screen_point_to_table(*start_pos)
+            end_pos = self.screen_point_to_table(*end_pos)
+            
             if self.cue_ball_body:
                 cue_x, cue_y = self.cue_ball_body.position
-                self.aim_vector_start = (int(cue_x), int(cue_y))
+                self.aim_vector_start = (float(cue_x), float(cue_y))
             else:
                 self.aim_vector_start = start_pos
             
@@ -587,8 +671,8 @@ class BilliardGame:
                 norm_dy = dy / distance
                 
                 self.aim_vector_end = (
-                    int(self.aim_vector_start[0] + norm_dx * length),
-                    int(self.aim_vector_start[1] + norm_dy * length)
+                    self.aim_vector_start[0] + norm_dx * length,
+                    self.aim_vector_start[1] + norm_dy * length
                 )
             else:
                 self.aim_vector_end = (
@@ -621,6 +705,7 @@ class BilliardGame:
         self.frozen_direction = None
         self.current_power = 0.0
         self.power_origin = None
+        self.shot_input_time = None
         
         # PYMUNK: Limpiar espacio y recrear
         for number, body in list(self.ball_bodies.items()):
@@ -632,3 +717,31 @@ class BilliardGame:
         self.ball_colors.clear()
         
         self.initialize_balls()
+
+    
+    def get_state(self):
+        """Devuelve las posiciones actuales de las bolas {número: (x, y)}"""
+        return {
+            number: (float(body.position.x), float(body.position.y))
+            for number, body in self.ball_bodies.items()
+        }
+    
+    def set_state(self, positions):
+        """Coloca las bolas en las posiciones dadas ({número: (x, y)}) y las deja en reposo"""
+        # Quitar las bolas que no aparecen en el estado
+        for number in list(self.ball_bodies.keys()):
+            if number not in positions:
+                body = self.ball_bodies.pop(number)
+                shape = self.ball_shapes.pop(number)
+                self.space.remove(body, shape)
+                self.ball_colors.pop(number, None)
+        
+        for number, (x, y) in positions.items():
+            body = self.ball_bodies.get(number)
+            if body is None:
+                # Bola embocada antes: recrearla con su color original
+                self.create_ball(x, y, number, self.ball_palette[number], is_cue=(number == 0))
+                continue
+            body.position = (x, y)
+            body.velocity = (0, 0)
+            body.angular_velocity = 0
@@ -0,0 +1,76 @@
+"""
+Captura de cámara sin copias: anillo de buffers preasignados reutilizados en cada frame
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+CAPTURE_RING_SIZE = 3  # Frames que pueden seguir en uso mientras se captura el siguiente
+
+
+def parse_resolution(text):
+    """Convierte '640x480' en (640, 480) (para argparse)"""
+    try:
+        width, height = (int(value) for value in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"resolución no válida: {text} (usa ANCHOxALTO)")
+    return width, height
+
+
+class CameraCapture:
+    def __init__(self, index=0, width=640, height=480, ring_size=CAPTURE_RING_SIZE):
+        self.cap = cv2.VideoCapture(index)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+        # La cámara puede ignorar la resolución pedida: usar la real si la informa
+        real_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or width
+        real_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or height
+        self.ring_size = ring_size
+        self._allocate(real_height, real_width)
+        self.timestamp = None  # Instante (perf_counter) en que llegó el último frame
+
+    def _allocate(self, height, width):
+        """Reserva el anillo de buffers BGR y RGB para una resolución dada"""
+        self.shape = (height, width, 3)
+        self._bgr_ring = [np.empty(self.shape, dtype=np.uint8) for _ in range(self.ring_size)]
+        self._rgb_ring = [np.empty(self.shape, dtype=np.uint8) for _ in range(self.ring_size)]
+        self._slot = 0
+
+    def read(self):
+        """
+        Lee el siguiente frame en el anillo.
+
+        Returns:
+            tuple: (frame BGR espejado, vista RGB de solo lectura) o (None, None) si falla
+        """
+        self._slot = (self._slot + 1) % self.ring_size
+        frame = self._bgr_ring[self._slot]
+
+        ret, captured = self.cap.read(frame)
+        if not ret:
+            return None, None
+        self.timestamp = time.perf_counter()
+        if captured.shape != self.shape:
+            # La cámara entregó otro tamaño: reasignar el anillo una vez
+            self._allocate(*captured.shape[:2])
+            frame = self._bgr_ring[self._slot]
+        if captured.ctypes.data != frame.ctypes.data:
+            # El backend ignoró el buffer de destino: copiar al hueco del anillo
+            np.copyto(frame, captured)
+
+        # Espejo y conversión a RGB escribiendo en los buffers preasignados
+        cv2.flip(frame, 1, dst=frame)
+        rgb = self._rgb_ring[self._slot]
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+
+        # MediaPipe recibe una vista de solo lectura (la pasa por referencia, sin copiar)
+        rgb_view = rgb.view()
+        rgb_view.flags.writeable = False
+        return frame, rgb_view
+
+    def release(self):
+        """Libera la cámara"""
+        self.cap.release()
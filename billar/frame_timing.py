@@ -0,0 +1,123 @@
+"""
+Ritmo de frames y medición de latencia
+
+FramePacer ajusta el retardo de cv2.waitKey al tiempo que queda hasta el siguiente frame,
+descontando lo que waitKey suele dormir de más. LatencyProbe mide, desde el instante de
+captura de cada frame de cámara, cuánto tarda en llegar a cada etapa y a la pantalla, y
+el movimiento→fotón de los tiros: del frame con el gesto de disparo al primer frame
+mostrado con la bola blanca en movimiento.
+"""
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from game_log import get_logger, log_event
+
+logger = get_logger('latency')
+
+PACER_FPS = 60               # Ritmo sin cámara (con cámara lo marca la captura)
+PACER_ALPHA = 0.1            # Peso de la última medida del exceso de waitKey
+LATENCY_WINDOW = 600         # Muestras recientes por etapa para los percentiles
+LATENCY_REPORT_INTERVAL = 10.0
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+class FramePacer:
+    """Elige el retardo de cv2.waitKey para cumplir el periodo de frame sin dormir de más"""
+
+    def __init__(self, fps=PACER_FPS, wait_key=cv2.waitKey):
+        self.period = 1.0 / fps
+        self.deadline = None
+        self.oversleep_ms = 1.0  # Lo que waitKey duerme de más sobre lo pedido (media móvil)
+        self._wait_key = wait_key
+
+    def wait_key(self, paced=True):
+        """
+        cv2.waitKey con el retardo justo.
+
+        paced=False cuando otra cosa (la cámara) ya marca el ritmo: solo se atienden eventos.
+        """
+        now = time.perf_counter()
+        if not paced:
+            self.deadline = None
+            return self._wait_key(1)
+
+        if self.deadline is None:
+            self.deadline = now + self.period
+        elif now > self.deadline:
+            self.deadline = now  # Frame largo: reanclar en vez de recuperar a ráfagas
+
+        delay = max(1, round((self.deadline - now) * 1000 - self.oversleep_ms))
+        key = self._wait_key(delay)
+        slept_ms = (time.perf_counter() - now) * 1000
+        self.oversleep_ms += PACER_ALPHA * (max(0.0, slept_ms - delay) - self.oversleep_ms)
+        self.deadline += self.period
+        return key
+
+
+class LatencyProbe:
+    """Latencias desde la captura de cada frame hasta cada etapa y hasta la pantalla"""
+
+    def __init__(self, report_interval=LATENCY_REPORT_INTERVAL):
+        self.report_interval = report_interval
+        self.samples = {}           # {etapa: deque de ms}
+        self.summary = "LATENCIA: midiendo..."
+        self._capture_time = None
+        self._last_report = time.perf_counter()
+
+    def _add(self, stage, seconds):
+        values = self.samples.get(stage)
+        if values is None:
+            values = self.samples[stage] = deque(maxlen=LATENCY_WINDOW)
+        values.append(seconds * 1000)
+
+    def begin_frame(self, capture_time):
+        """Empieza a seguir un frame de cámara (instante de captura, perf_counter)"""
+        self._capture_time = capture_time
+
+    def mark(self, stage):
+        """Latencia desde la captura hasta esta etapa del frame actual"""
+        if self._capture_time is not None:
+            self._add(stage, time.perf_counter() - self._capture_time)
+
+    def frame_presented(self, game):
+        """Llamar justo después de entregar el frame a la ventana (cv2.imshow)"""
+        now = time.perf_counter()
+        if self._capture_time is not None:
+            self._add('present', now - self._capture_time)
+            self._capture_time = None
+
+        # Primer frame mostrado con la blanca moviéndose tras un tiro con gesto
+        cue = game.cue_ball_body
+        if game.shot_input_time is not None and cue is not None and cue.velocity.length > 0:
+            self._add('shot', now - game.shot_input_time)
+            game.shot_input_time = None
+
+        if now - self._last_report >= self.report_interval:
+            self.report()
+
+    def percentiles(self, stage):
+        values = self.samples.get(stage)
+        if not values:
+            return None
+        return np.percentile(np.fromiter(values, dtype=np.float64), LATENCY_PERCENTILES)
+
+    def report(self):
+        """Registra los percentiles de cada etapa y actualiza el resumen en pantalla"""
+        self._last_report = time.perf_counter()
+        parts = []
+        for stage, values in self.samples.items():
+            p50, p90, p99 = self.percentiles(stage)
+            log_event(logger, 'latency', stage=stage, samples=len(values),
+                      p50_ms=p50, p90_ms=p90, p99_ms=p99, max_ms=max(values))
+            if stage in ('present', 'shot'):
+                parts.append(f"{stage} p50 {p50:.0f} / p99 {p99:.0f} ms")
+        if parts:
+            self.summary = "LATENCIA: " + " | ".join(parts)
+
+    def draw(self, frame):
+        """Resumen de la última medición en la esquina superior derecha"""
+        cv2.putText(frame, self.summary, (frame.shape[1] - 560, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
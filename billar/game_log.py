@@ -0,0 +1,131 @@
+"""
+Registro estructurado y no bloqueante: el bucle del juego solo encola, un hilo aparte escribe
+"""
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+LOG_QUEUE_SIZE = 1000   # Registros pendientes antes de empezar a descartar
+LOG_RATE = 5.0          # Registros por segundo permitidos por evento
+LOG_BURST = 10          # Ráfaga máxima por evento
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(name)s %(message)s'
+
+_listener = None
+
+
+def get_logger(name):
+    """Logger del juego (todos cuelgan de 'billar')"""
+    return logging.getLogger(f'billar.{name}')
+
+
+def log_event(logger, event, level=logging.INFO, **fields):
+    """Registra un evento estructurado: nombre del evento + campos clave=valor"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'event': event, 'fields': fields})
+
+
+class StructuredFormatter(logging.Formatter):
+    """Añade los campos del evento como clave=valor (se ejecuta en el hilo escritor)"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(
+                f'{key}={value:.2f}' if isinstance(value, float) else f'{key}={value}'
+                for key, value in fields.items()
+            )
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            line += f' (+{suppressed} suprimidos)'
+        return line
+
+
+class RateLimitFilter(logging.Filter):
+    """Limita cada evento con un cubo de fichas; cuenta los registros suprimidos"""
+
+    def __init__(self, rate=LOG_RATE, burst=LOG_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # {evento: [fichas, último instante, suprimidos]}
+        # Handler.handle llama a filter() fuera del lock del handler: varios hilos
+        # (p. ej. las mesas de session_manager) pueden registrar a la vez
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, 'event', record.msg)
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed = bucket[2]
+            bucket[2] = 0
+        record.suppressed = suppressed
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Encola el registro tal cual (sin formatear) y lo descarta si la cola está llena"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # El formateo se hace en el hilo escritor, no en el del juego
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_logging(level=logging.INFO, stream=None):
+    """Activa el registro asíncrono: un hilo de fondo escribe en `stream` (stdout por defecto)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = _NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(StructuredFormatter(LOG_FORMAT, datefmt='%H:%M:%S'))
+
+    root = logging.getLogger('billar')
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, writer)
+    _listener.start()
+
+
+def stop_logging():
+    """Vacía la cola pendiente y detiene el hilo escritor"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+
+    root = logging.getLogger('billar')
+    for handler in list(root.handlers):
+        if isinstance(handler, _NonBlockingQueueHandler):
+            root.removeHandler(handler)
@@ -0,0 +1,246 @@
+"""
+Servidor asyncio de espectadores: difunde el estado de las bolas (no frames) a varios clientes
+"""
+import argparse
+import asyncio
+import struct
+import threading
+import time
+
+from game_log import get_logger, log_event, start_logging, stop_logging
+from state_codec import quantize_state, dequantize_state, encode_keyframe, encode_delta, apply_delta
+from table_config import TABLES, DEFAULT_TABLE
+
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+CLIENT_QUEUE_SIZE = 32  # Mensajes pendientes por cliente antes de descartar y resincronizar
+
+logger = get_logger('server')
+
+MSG_KEYFRAME = 0
+MSG_DELTA = 1
+
+# Cabecera de cada mensaje: (tipo, tick, puntuación, longitud del cuerpo)
+_HEADER = struct.Struct('<BIiH')
+
+
+def _message(kind, tick, score, body):
+    return _HEADER.pack(kind, tick, score, len(body)) + body
+
+
+class _Spectator:
+    """Cliente conectado con su propia cola (contrapresión independiente)"""
+
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.needs_keyframe = True
+        self.dropped = 0
+        self.task = asyncio.current_task()  # Tarea que lo atiende (stop() espera a que termine)
+
+    def disconnect(self):
+        """Pide a la tarea que termine: descarta lo pendiente, encola el fin y cierra el socket"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+        self.writer.close()
+
+
+class GameServer:
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, queue_size=CLIENT_QUEUE_SIZE):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self._server = None
+        self._clients = set()
+        self._last_state = {}
+        self._last_score = 0
+
+    async def start(self):
+        """Empieza a aceptar espectadores (port=0 elige un puerto libre)"""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Cierra el servidor y desconecta a todos los espectadores"""
+        if self._server is not None:
+            self._server.close()
+        # Primero los espectadores: desde Python 3.12 wait_closed espera a sus conexiones.
+        # (no se cancelan sus tareas: en 3.11 start_server registra la cancelación como error)
+        tasks = [client.task for client in self._clients]
+        for client in list(self._clients):
+            client.disconnect()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._clients.clear()
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    @property
+    def client_count(self):
+        return len(self._clients)
+
+    def publish(self, tick, positions, score):
+        """
+        Difunde el estado de un tick (llamar desde el hilo del event loop).
+
+        Nunca espera a los clientes: si la cola de uno está llena se vacía y ese
+        cliente recibirá un keyframe completo en el siguiente tick.
+        """
+        state = quantize_state(positions)
+        previous = self._last_state
+        changed = state != previous or score != self._last_score
+        self._last_state = state
+        self._last_score = score
+
+        keyframe = None
+        delta = None
+        for client in self._clients:
+            if client.needs_keyframe:
+                if keyframe is None:
+                    keyframe = _message(MSG_KEYFRAME, tick, score, encode_keyframe(state))
+                message = keyframe
+            elif changed:
+                if delta is None:
+                    delta = _message(MSG_DELTA, tick, score, encode_delta(previous, state))
+                message = delta
+            else:
+                continue
+
+            try:
+                client.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Cliente lento: los deltas pendientes ya no sirven, resincronizar
+                while not client.queue.empty():
+                    client.queue.get_nowait()
+                client.needs_keyframe = True
+                client.dropped += 1
+                log_event(logger, 'spectator_resync', dropped=client.dropped)
+            else:
+                client.needs_keyframe = False
+
+    async def _handle_client(self, reader, writer):
+        client = _Spectator(writer, self.queue_size)
+        self._clients.add(client)
+        try:
+            while True:
+                message = await client.queue.get()
+                if message is None:
+                    break  # stop()
+                writer.write(message)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass  # El espectador se desconectó (una cancelación de la tarea sí se propaga)
+        finally:
+            self._clients.discard(client)
+            writer.close()
+
+    async def run_game(self, game, ai_player=None, fps=60):
+        """Bucle autoritativo sin ventanas: simula, tira con la IA y difunde cada tick"""
+        loop = asyncio.get_running_loop()
+        frame_time = 1.0 / fps
+        tick = 0
+        next_time = time.perf_counter()
+        while True:
+            if ai_player is not None and not game.any_ball_moving():
+                # La búsqueda corre en otro hilo: los espectadores siguen atendidos
+                shot = await loop.run_in_executor(None, ai_player.choose_shot, game)
+                if shot is not None:
+                    ai_player.take_shot(game, shot)
+                next_time = time.perf_counter()
+
+            game.step_frame()
+            self.publish(tick, game.get_state(), game.score)
+            tick += 1
+
+            next_time += frame_time
+            await asyncio.sleep(max(0.0, next_time - time.perf_counter()))
+
+
+class ServerThread:
+    """Ejecuta un GameServer en su propio hilo para publicar desde el bucle de OpenCV"""
+
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT):
+        self.server = GameServer(host, port)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self._loop).result()
+
+    def publish(self, tick, positions, score):
+        """Encola la publicación en el hilo del servidor (no bloquea al juego)"""
+        self._loop.call_soon_threadsafe(self.server.publish, tick, positions, score)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+class SpectatorClient:
+    """Cliente de loopback: reconstruye el estado de las bolas a partir de los mensajes"""
+
+    def __init__(self):
+        self.state = {}  # Estado cuantizado {número: (qx, qy)}
+        self.tick = -1
+        self.score = 0
+        self._reader = None
+        self._writer = None
+
+    async def connect(self, host=SERVER_HOST, port=SERVER_PORT):
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+
+    async def receive(self):
+        """Lee y aplica el siguiente mensaje; devuelve su tick"""
+        header = await self._reader.readexactly(_HEADER.size)
+        kind, tick, score, length = _HEADER.unpack(header)
+        body = await self._reader.readexactly(length)
+        if kind == MSG_KEYFRAME:
+            self.state.clear()
+        apply_delta(body, 0, self.state)
+        self.tick = tick
+        self.score = score
+        return tick
+
+    def positions(self):
+        """Posiciones actuales en coordenadas de mesa"""
+        return dequantize_state(self.state)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def _serve_headless(host, port, table):
+    from billiard_game import BilliardGame
+    from ai_player import AIPlayer
+
+    game = BilliardGame(width=1200, height=800, table=table)
+    server = GameServer(host, port)
+    await server.start()
+    log_event(logger, 'server_started', host=host, port=server.port)
+    try:
+        await server.run_game(game, AIPlayer())
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partida autoritativa sin ventanas con espectadores remotos")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--table', default=DEFAULT_TABLE, choices=sorted(TABLES),
+                        help="Mesa y reglas (ver table_config.py)")
+    args = parser.parse_args()
+    start_logging()
+    try:
+        asyncio.run(_serve_headless(args.host, args.port, args.table))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_logging()
+
+
+if __name__ == "__main__":
+    main()
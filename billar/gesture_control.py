@@ -0,0 +1,154 @@
+"""
+Control del juego con gestos: el estado de las manos entre frames y los avisos de cada fase
+(una instancia por mesa, así varias partidas pueden convivir en el mismo proceso)
+"""
+import cv2
+import numpy as np
+
+from game_log import get_logger, log_event
+
+logger = get_logger('gestures')
+
+SHOT_GESTURE_SPEED = 30  # Píxeles por frame de la mano derecha que disparan en FASE 2
+
+
+class GestureState:
+    """Estado de los gestos de una mesa (posiciones previas y transiciones de la mano izquierda)"""
+
+    def __init__(self):
+        self.prev_left_pos = None
+        self.prev_right_pos = None
+        self.left_was_closed = False  # Para detectar transición cerrada->abierta
+
+    def reset(self):
+        self.prev_left_pos = None
+        self.prev_right_pos = None
+        self.left_was_closed = False
+
+    def update(self, game, hand_tracker, left_hand, right_hand, frame_shape, input_time=None, frames=1):
+        """
+        Aplica los gestos de ambas manos (coordenadas de la cámara) al juego.
+
+        input_time: instante de captura del frame, se pasa al tiro para medir la latencia
+        frames: frames de cámara desde la detección anterior (más de 1 si la inferencia salta
+            frames): el desplazamiento de la mano se reparte entre ellos para medir la velocidad
+        """
+        if game.any_ball_moving():
+            return
+
+        # MANO IZQUIERDA: Controla el vector de apunte y inicio del tiro
+        if left_hand is not None:
+            # Mapear posición de la cámara a la pantalla del juego
+            game_x, game_y = self._to_game(game, left_hand, frame_shape)
+
+            if hand_tracker.is_hand_open(left_hand['landmarks']):
+                # Mano ABIERTA
+                if game.game_phase == 'idle':
+                    # PREVIEW: mostrar vector de dirección
+                    if right_hand is not None:
+                        # El vector va desde mano izquierda hacia mano derecha
+                        game.set_aim_vector((game_x, game_y), self._to_game(game, right_hand, frame_shape))
+                    else:
+                        # Si solo hay mano izquierda, usar dirección por defecto
+                        game.set_aim_vector((game_x, game_y), (game_x, game_y - 100))
+
+                elif game.game_phase == 'aiming_direction' and self.left_was_closed:
+                    # TRANSICIÓN: cerrada -> abierta = CONGELAR DIRECCIÓN (pasar a FASE 2)
+                    game.freeze_direction()
+
+                self.left_was_closed = False
+            else:
+                # Mano CERRADA
+                game.hide_aim_vector()
+
+                if game.game_phase == 'idle':
+                    # Iniciar FASE 1 (selección de dirección)
+                    game.start_aiming(game_x, game_y)
+                    self.prev_right_pos = None
+                elif game.game_phase == 'aiming_power':
+                    # VOLVER a FASE 1 (cancelar potencia)
+                    game.cancel_power_phase()
+
+                self.left_was_closed = True
+
+            self.prev_left_pos = (game_x, game_y)
+        else:
+            game.hide_aim_vector()
+            if game.aiming and self.prev_left_pos is None:
+                game.reset_aim()
+            self.prev_left_pos = None
+            self.left_was_closed = False
+
+        # MANO DERECHA: Actualiza dirección (FASE 1) o potencia (FASE 2), y dispara
+        if right_hand is not None and game.aiming:
+            game_x, game_y = self._to_game(game, right_hand, frame_shape)
+
+            # Actualizar dirección (FASE 1) o potencia (FASE 2)
+            game.update_aim(game_x, game_y)
+
+            # Detectar gesto de disparo (movimiento rápido) - SOLO EN FASE 2
+            if game.game_phase == 'aiming_power' and self.prev_right_pos is not None:
+                dx = game_x - self.prev_right_pos[0]
+                dy = game_y - self.prev_right_pos[1]
+                speed = np.sqrt(dx**2 + dy**2) / frames
+
+                # Si hay movimiento significativo, disparar
+                if speed > SHOT_GESTURE_SPEED:
+                    game.shoot(input_time)
+                    log_event(logger, 'shot_gesture', speed=float(speed))
+
+            self.prev_right_pos = (game_x, game_y)
+
+        # Si se pierde la mano derecha mientras apuntaba en FASE 2, disparar
+        if right_hand is None and game.game_phase == 'aiming_power' and self.prev_right_pos is not None:
+            game.shoot(input_time)
+            self.prev_right_pos = None
+
+    @staticmethod
+    def _to_game(game, hand, frame_shape):
+        """Índice de la mano (píxeles de la cámara) → píxeles de la pantalla del juego"""
+        x = int(np.interp(int(hand['index'][0]), [0, frame_shape[1]], [0, game.width]))
+        y = int(np.interp(int(hand['index'][1]), [0, frame_shape[0]], [0, game.height]))
+        return x, y
+
+
+def draw_phase_hint(game, frame):
+    """Escribe el aviso de la fase actual del tiro en la parte superior de la mesa"""
+    if game.any_ball_moving():
+        msg = "BOLAS EN MOVIMIENTO..."
+        cv2.putText(frame, msg, (game.width//2 - 200, 150),
+                   cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 100, 100), 3)
+    elif game.show_aim_vector:
+        # MODO PREVIEW - Azul claro
+        msg1 = "MODO PREVIEW (Mano Izq ABIERTA)"
+        msg2 = "Cierra mano izquierda para SELECCIONAR DIRECCION"
+        azul = (255, 200, 100)
+        cv2.putText(frame, msg1, (game.width//2 - 280, 140),
+                   cv2.FONT_HERSHEY_DUPLEX, 1, azul, 3)
+        cv2.putText(frame, msg2, (game.width//2 - 340, 175),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
+    elif game.game_phase == 'aiming_direction':
+        # FASE 1 - Naranja/Azul
+        msg1 = "FASE 1: SELECCION DE DIRECCION"
+        msg2 = "Mueve mano DERECHA | Abre mano IZQ para FIJAR y pasar a FASE 2"
+        color = (255, 150, 0)
+        cv2.putText(frame, msg1, (game.width//2 - 280, 140),
+                   cv2.FONT_HERSHEY_DUPLEX, 1, color, 3)
+        cv2.putText(frame, msg2, (game.width//2 - 380, 175),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
+    elif game.game_phase == 'aiming_power':
+        # FASE 2 - Rojo
+        msg1 = "FASE 2: AJUSTE DE POTENCIA"
+        msg2 = "Mueve mano DERECHA rapidamente para DISPARAR"
+        rojo = (0, 0, 255)
+        cv2.putText(frame, msg1, (game.width//2 - 280, 140),
+                   cv2.FONT_HERSHEY_DUPLEX, 1, rojo, 3)
+        cv2.putText(frame, msg2, (game.width//2 - 320, 175),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
+    else:
+        msg1 = "MANO IZQUIERDA:"
+        msg2 = "ABIERTA = Preview  |  CERRADA = Seleccionar Direccion"
+        cv2.putText(frame, msg1, (game.width//2 - 180, 140),
+                   cv2.FONT_HERSHEY_DUPLEX, 0.9, (255, 255, 255), 2)
+        cv2.putText(frame, msg2, (game.width//2 - 340, 175),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (150, 200, 255), 2)
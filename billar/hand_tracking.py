@@ -1,21 +1,59 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 
 class HandTracker:
-    def __init__(self):
+    def __init__(self, model_complexity=1, max_num_hands=2, min_detection_confidence=0.7):
+        # MediaPipe tarda segundos en importarse: se carga al crear el tracker, no al importar el módulo
+        import mediapipe as mp
+        
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        self.mp_draw = mp.solutions.drawing_utils
+        self.settings = {
+            'model_complexity': model_complexity,
+            'max_num_hands': max_num_hands,
+            'min_detection_confidence': min_detection_confidence,
+        }
+        self.hands = self._create_hands()
+        self._small = None  # Buffer reutilizado para la inferencia a escala reducida
+    
+    def _create_hands(self):
+        return self.mp_hands.Hands(
             static_image_mode=False,
-            max_num_hands=2,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.5
+            min_tracking_confidence=0.5,
+            **self.settings
         )
-        self.mp_draw = mp.solutions.drawing_utils
+    
+    def configure(self, **settings):
+        """Cambia los ajustes del modelo; solo lo recarga si alguno cambió"""
+        changed = {key: value for key, value in settings.items()
+                   if value is not None and self.settings[key] != value}
+        if not changed:
+            return
+        self.settings.update(changed)
+        self.hands.close()
+        self.hands = self._create_hands()
         
     def process_frame(self, frame):
         """Procesa el frame y detecta las manos"""
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return self.process_rgb(rgb_frame)
+    
+    def process_rgb(self, rgb_frame, scale=1.0):
+        """
+        Detecta las manos en un frame que ya está en RGB (sin convertir ni copiar).
+        
+        Con scale < 1 la inferencia se hace sobre una copia reducida en un buffer reutilizado.
+        Los landmarks salen normalizados (0-1) respecto a la imagen completa, así que se
+        siguen mapeando con el tamaño del frame original.
+        """
+        if scale < 1.0:
+            h, w = rgb_frame.shape[:2]
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            if self._small is None or self._small.shape[:2] != (size[1], size[0]):
+                self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            cv2.resize(rgb_frame, size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+            rgb_frame = self._small.view()
+            rgb_frame.flags.writeable = False
         results = self.hands.process(rgb_frame)
         return results
     
@@ -0,0 +1,119 @@
+"""
+Ajuste automático de la inferencia de manos: mide la latencia de MediaPipe en marcha y
+baja (o sube) la escala de entrada, el modelo y la frecuencia de inferencia para
+mantener el objetivo sin hundir el bucle del juego en equipos lentos sin GPU
+"""
+import statistics
+import time
+from collections import deque, namedtuple
+
+from game_log import get_logger, log_event
+
+logger = get_logger('inference')
+
+INFERENCE_TARGET_MS = 30.0  # Coste de inferencia por frame objetivo (el bucle debe quedar > 15 FPS)
+LATENCY_WINDOW = 15         # Medidas recientes cuya mediana decide (ignora picos aislados)
+DEGRADE_MARGIN = 1.2        # Bajar de nivel si la media supera objetivo * margen
+UPGRADE_MARGIN = 0.6        # Subir de nivel si la media queda por debajo de objetivo * margen
+WARMUP_SAMPLES = 2          # Medidas descartadas tras un cambio (el modelo recién cargado es lento)
+UPGRADE_SAMPLES = 90        # Medidas mínimas en un nivel antes de intentar subir
+MAX_UPGRADE_SAMPLES = 2000  # Tope de la espera tras subidas fallidas a un mismo nivel
+
+# Niveles de calidad, del mejor al más barato. Las dos manos se mantienen siempre
+# (el juego las necesita); se reduce primero la resolución, que no recarga el modelo.
+InferenceLevel = namedtuple('InferenceLevel', ['scale', 'model_complexity', 'every'])
+INFERENCE_LEVELS = [
+    InferenceLevel(1.0, 1, 1),
+    InferenceLevel(0.75, 1, 1),
+    InferenceLevel(0.75, 0, 1),
+    InferenceLevel(0.5, 0, 1),
+    InferenceLevel(0.5, 0, 2),   # Inferir 1 de cada 2 frames y reutilizar el resultado
+    InferenceLevel(0.4, 0, 3),
+]
+
+
+class InferenceTuner:
+    """Elige el nivel de inferencia según la latencia medida (con histéresis)"""
+
+    def __init__(self, target_ms=INFERENCE_TARGET_MS, levels=INFERENCE_LEVELS, start_level=0):
+        self.target_ms = target_ms
+        self.levels = levels
+        self.index = start_level
+        self.latency_ms = None    # Mediana de las últimas medidas en el nivel actual
+        self._window = deque(maxlen=LATENCY_WINDOW)
+        self.samples = 0          # Medidas desde el último cambio de nivel
+        # Medidas a esperar antes de subir a cada nivel (crece si la subida rebota)
+        self.upgrade_samples = [UPGRADE_SAMPLES] * len(levels)
+        self._upgraded = False    # Se llegó al nivel actual subiendo (para detectar rebotes)
+        self._frame = 0
+        self._inferred_frame = 0  # Frame de la última inferencia
+        self._results = None
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def record(self, elapsed_ms):
+        """
+        Añade una medida (ms de inferencia por frame) y cambia de nivel si hace falta.
+
+        Returns:
+            bool: True si cambió el nivel
+        """
+        self.samples += 1
+        if self.samples <= WARMUP_SAMPLES:
+            return False
+        self._window.append(elapsed_ms)
+        if len(self._window) < LATENCY_WINDOW:
+            return False
+        self.latency_ms = statistics.median(self._window)
+
+        if self.latency_ms > self.target_ms * DEGRADE_MARGIN and self.index < len(self.levels) - 1:
+            if self._upgraded and self.samples < UPGRADE_SAMPLES:
+                # La subida a este nivel no se sostuvo: esperar más antes de volver a probarlo
+                self.upgrade_samples[self.index] = min(self.upgrade_samples[self.index] * 2,
+                                                       MAX_UPGRADE_SAMPLES)
+            self._change(self.index + 1, upgraded=False)
+            return True
+        if (self.index > 0 and self.latency_ms < self.target_ms * UPGRADE_MARGIN
+                and self.samples >= self.upgrade_samples[self.index - 1]):
+            self._change(self.index - 1, upgraded=True)
+            return True
+        return False
+
+    def _change(self, index, upgraded):
+        log_event(logger, 'inference_level', index=index, scale=self.levels[index].scale,
+                  model_complexity=self.levels[index].model_complexity,
+                  every=self.levels[index].every, latency_ms=self.latency_ms)
+        self.index = index
+        self.latency_ms = None
+        self._window.clear()
+        self.samples = 0
+        self._upgraded = upgraded
+
+    def process(self, hand_tracker, rgb_frame):
+        """
+        Detecta las manos con el nivel actual, midiendo la latencia.
+
+        En los niveles que saltan frames devuelve el último resultado sin inferir.
+        Los landmarks son normalizados (0-1), así que se siguen mapeando con el
+        tamaño del frame mostrado aunque la inferencia se haga a menor escala.
+
+        Returns:
+            tuple: (resultados, frames de cámara desde la inferencia anterior). 0 frames si el
+                resultado es el de un frame anterior: las manos no se han vuelto a medir, así que
+                no sirve para velocidades ni latencias (y las velocidades se dividen por los frames)
+        """
+        level = self.level
+        self._frame += 1
+        if self._results is not None and self._frame % level.every:
+            return self._results, 0
+
+        hand_tracker.configure(model_complexity=level.model_complexity)
+        start = time.perf_counter()
+        self._results = hand_tracker.process_rgb(rgb_frame, scale=level.scale)
+        # En los niveles que saltan frames el coste se reparte entre los frames reutilizados
+        self.record((time.perf_counter() - start) * 1000 / level.every)
+        frames = self._frame - self._inferred_frame
+        self._inferred_frame = self._frame
+        return self._results, frames
@@ -1,203 +1,230 @@
+import time
+_PROCESS_START = time.perf_counter()  # Referencia para el informe de arranque
+
+import argparse
+import logging
 import cv2
 import numpy as np
-from hand_tracking import HandTracker
 from billiard_game import BilliardGame
-from pymunk_config import SIMULATION_DT
+from ai_player import AIPlayer
+from game_log import get_logger, log_event, start_logging, stop_logging
+from startup import StartupTimer, HandInputLoader
+from camera_capture import parse_resolution
+from gesture_control import GestureState, draw_phase_hint
+from inference_tuner import InferenceTuner, INFERENCE_TARGET_MS
+from frame_timing import FramePacer, LatencyProbe
+from table_config import TABLES, DEFAULT_TABLE
+
+logger = get_logger('main')
+
+# Vista previa de la cámara dentro de la ventana del juego (modo una sola ventana)
+PREVIEW_SIZE = (224, 168)  # (ancho, alto)
+PREVIEW_MARGIN = 10
+
+
+def parse_args():
+    """Opciones de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Juego de billar controlado con gestos")
+    parser.add_argument('--table', default=DEFAULT_TABLE, choices=sorted(TABLES),
+                        help="Mesa y reglas (ver table_config.py)")
+    parser.add_argument('--camera-size', type=parse_resolution, default=(640, 480), metavar='ANCHOxALTO',
+                        help="Resolución pedida a la cámara (640x480 por defecto)")
+    parser.add_argument('--inference-ms', type=float, default=INFERENCE_TARGET_MS,
+                        help="Coste objetivo de la detección de manos por frame; se ajusta "
+                             "la escala y el modelo para mantenerlo")
+    parser.add_argument('--single-window', action='store_true',
+                        help="Una sola ventana: la cámara se dibuja en una esquina del juego")
+    parser.add_argument('--serve', action='store_true',
+                        help="Difundir el estado de las bolas a espectadores remotos")
+    parser.add_argument('--port', type=int, default=None,
+                        help="Puerto del servidor de espectadores (8765 por defecto)")
+    parser.add_argument('--record', metavar='ARCHIVO',
+                        help="Grabar la partida (ver con: python replay.py ARCHIVO)")
+    parser.add_argument('--export-video', metavar='ARCHIVO',
+                        help="Grabar en vídeo lo que se ve en la ventana del juego (.mp4)")
+    parser.add_argument('--video-camera', action='store_true',
+                        help="Incluir la cámara en el vídeo aunque se muestre en otra ventana")
+    parser.add_argument('--latency', action='store_true',
+                        help="Medir la latencia cámara→pantalla y gesto→tiro (percentiles en el registro)")
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="Nivel mínimo de los mensajes de registro")
+    return parser.parse_args()
+
 
 def main():
+    args = parse_args()
+    # Registro en un hilo aparte: el bucle del juego nunca escribe en la terminal
+    start_logging(getattr(logging, args.log_level))
+    timer = StartupTimer(_PROCESS_START)
+    timer.mark('imports')
+    
+    # Cámara y MediaPipe (lo más lento) se cargan en segundo plano
+    camera_width, camera_height = args.camera_size
+    hand_input = HandInputLoader(0, width=camera_width, height=camera_height, timer=timer)
+    hand_input.start()
+    
     # Inicializar componentes
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    game = BilliardGame(width=1200, height=800, table=args.table)
+    ai_player = AIPlayer()
+    # Escala de entrada y modelo de MediaPipe según la latencia medida
+    tuner = InferenceTuner(target_ms=args.inference_ms)
+    timer.mark('game_ready')
+    
+    # Servidor de espectadores (opcional) en su propio hilo; se importa solo si se usa
+    server = None
+    if args.serve:
+        from game_server import ServerThread, SERVER_PORT
+        server = ServerThread(port=SERVER_PORT if args.port is None else args.port)
+        server.start()
+        print(f"Servidor de espectadores en el puerto {server.server.port}")
+    tick = 0
+    
+    # Grabación de la partida (opcional)
+    recorder = None
+    if args.record:
+        from replay import ReplayRecorder
+        recorder = ReplayRecorder(args.record, table=game.table_name)
     
-    hand_tracker = HandTracker()
-    game = BilliardGame(width=1200, height=800)
+    # Vídeo (opcional): se codifica en otro hilo y descarta frames antes que frenar el juego
+    exporter = None
+    if args.export_video:
+        from video_export import VideoExporter
+        exporter = VideoExporter(args.export_video, (game.width, game.height))
     
-    # Variables para control de gestos
-    prev_left_pos = None
-    prev_right_pos = None
-    left_was_closed = False  # Para detectar transición cerrada->abierta
+    # Buffers reutilizados en cada frame
+    game_frame = np.zeros((game.height, game.width, 3), dtype=np.uint8)
+    preview = np.empty((PREVIEW_SIZE[1], PREVIEW_SIZE[0], 3), dtype=np.uint8)
+    preview_x = game.width - PREVIEW_SIZE[0] - PREVIEW_MARGIN
+    preview_y = game.height - PREVIEW_SIZE[1] - PREVIEW_MARGIN
+    
+    # Estado de los gestos entre frames
+    gestures = GestureState()
+    
+    # Ritmo de frames sin dormir de más y, opcionalmente, medición de latencia
+    pacer = FramePacer()
+    probe = LatencyProbe() if args.latency else None
     
     print("=== JUEGO DE BILLAR CON MEDIAPIPE ===")
     print("FASE IDLE - Mano izquierda ABIERTA: Preview del vector")
     print("FASE 1 - Mano izquierda CERRADA: Seleccionar dirección con mano derecha")
     print("FASE 2 - Mano izquierda ABIERTA (de nuevo): Ajustar potencia con mano derecha")
     print("         Movimiento rápido de mano derecha: DISPARAR")
+    print("Presiona 'I' para que tire la computadora")
     print("Presiona 'R' para reiniciar | 'Q' para salir")
     print("=====================================")
     
     while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Voltear frame horizontalmente para efecto espejo
-        frame = cv2.flip(frame, 1)
-        
-        # Procesar detección de manos
-        results = hand_tracker.process_frame(frame)
-        
-        # Dibujar manos en el frame de la cámara
-        camera_display = frame.copy()
-        camera_display = hand_tracker.draw_hands(camera_display, results)
-        
-        # Obtener datos de ambas manos
-        left_hand, right_hand = hand_tracker.get_hand_data(results, frame.shape)
-        
-        # Control del juego con las manos
-        if not game.any_ball_moving():
-            # MANO IZQUIERDA: Controla el vector de apunte y inicio del tiro
-            if left_hand is not None:
-                left_x = int(left_hand['index'][0])
-                left_y = int(left_hand['index'][1])
-                
-                # Mapear posición de la cámara a la pantalla del juego
-                game_x = int(np.interp(left_x, [0, frame.shape[1]], [0, game.width]))
-                game_y = int(np.interp(left_y, [0, frame.shape[0]], [0, game.height]))
-                
-                is_hand_open = hand_tracker.is_hand_open(left_hand['landmarks'])
-                
-                if is_hand_open:
-                    # Mano ABIERTA
-                    if game.game_phase == 'idle':
-                        # PREVIEW: mostrar vector de dirección
-                        if right_hand is not None:
-                            right_x = int(right_hand['index'][0])
-                            right_y = int(right_hand['index'][1])
-                            
-                            # Mapear mano derecha al juego
-                            game_right_x = int(np.interp(right_x, [0, frame.shape[1]], [0, game.width]))
-                            game_right_y = int(np.interp(right_y, [0, frame.shape[0]], [0, game.height]))
-                            
-                            # El vector va desde mano izquierda hacia mano derecha
-                            game.set_aim_vector((game_x, game_y), (game_right_x, game_right_y))
-                        else:
-                            # Si solo hay mano izquierda, usar dirección por defecto
-                            game.set_aim_vector((game_x, game_y), (game_x, game_y - 100))
-                    
-                    elif game.game_phase == 'aiming_direction' and left_was_closed:
-                        # TRANSICIÓN: cerrada -> abierta = CONGELAR DIRECCIÓN (pasar a FASE 2)
-                        game.freeze_direction()
-                        left_was_closed = False
-                    
-                    left_was_closed = False
-                else:
-                    # Mano CERRADA
-                    game.hide_aim_vector()
-                    
-                    if game.game_phase == 'idle':
-                        # Iniciar FASE 1 (selección de dirección)
-                        game.start_aiming(game_x, game_y)
-                        prev_right_pos = None
-                    elif game.game_phase == 'aiming_power':
-                        # VOLVER a FASE 1 (cancelar potencia)
-                        game.cancel_power_phase()
-                    
-                    left_was_closed = True
-                
-                prev_left_pos = (game_x, game_y)
-            else:
-                game.hide_aim_vector()
-                if game.aiming and prev_left_pos is None:
-                    game.reset_aim()
-                prev_left_pos = None
-                left_was_closed = False
+        # Mientras carga la cámara/MediaPipe se juega sin manos (la mesa ya se ve)
+        hands_ready = hand_input.ready
+        if hands_ready:
+            capture = hand_input.capture
+            hand_tracker = hand_input.hand_tracker
             
-            # MANO DERECHA: Actualiza dirección (FASE 1) o potencia (FASE 2), y dispara
-            if right_hand is not None and game.aiming:
-                right_x = int(right_hand['index'][0])
-                right_y = int(right_hand['index'][1])
-                
-                # Mapear posición de la cámara a la pantalla del juego
-                game_x = int(np.interp(right_x, [0, frame.shape[1]], [0, game.width]))
-                game_y = int(np.interp(right_y, [0, frame.shape[0]], [0, game.height]))
-                
-                # Actualizar dirección (FASE 1) o potencia (FASE 2)
-                game.update_aim(game_x, game_y)
-                
-                # Detectar gesto de disparo (movimiento rápido) - SOLO EN FASE 2
-                if game.game_phase == 'aiming_power' and prev_right_pos is not None:
-                    dx = game_x - prev_right_pos[0]
-                    dy = game_y - prev_right_pos[1]
-                    speed = np.sqrt(dx**2 + dy**2)
-                    
-                    # Si hay movimiento significativo, disparar
-                    if speed > 30:
-                        game.shoot()
-                        print(f"[DISPARO] Velocidad detectada: {speed:.1f}")
-                
-                prev_right_pos = (game_x, game_y)
+            # Frame espejado (BGR) y su versión RGB, ambos en buffers reutilizados
+            frame, rgb_frame = capture.read()
+            if frame is None:
+                break
             
-            # Si se pierde la mano derecha mientras apuntaba en FASE 2, disparar
-            if right_hand is None and game.game_phase == 'aiming_power' and prev_right_pos is not None:
-                game.shoot()
-                prev_right_pos = None
-
-        # PYMUNK: Avanzar simulación de física
-        game.space.step(SIMULATION_DT)
-        game.update_physics()  # Detener bolas lentas
+            # Procesar detección de manos (a la escala que elija el ajuste automático).
+            # En los niveles que saltan frames el resultado puede ser el de un frame anterior:
+            # entonces no se aplican gestos ni se mide latencia (la mano no se ha vuelto a ver)
+            results, hand_frames = tuner.process(hand_tracker, rgb_frame)
+            if probe is not None and hand_frames:
+                probe.begin_frame(capture.timestamp)
+                probe.mark('inference')
+            timer.mark('first_tracked_frame')
+            
+            # Dibujar manos: sobre la miniatura (una ventana) o directamente sobre el frame
+            if args.single_window:
+                cv2.resize(frame, PREVIEW_SIZE, dst=preview, interpolation=cv2.INTER_AREA)
+                hand_tracker.draw_hands(preview, results)
+            else:
+                # El frame es nuestro (anillo de captura): se puede dibujar sin copiarlo
+                camera_display = hand_tracker.draw_hands(frame, results)
+            
+            # Obtener datos de ambas manos
+            left_hand, right_hand = hand_tracker.get_hand_data(results, frame.shape)
+        
+        # Control del juego con las manos
+        if hands_ready and hand_frames:
+            gestures.update(game, hand_tracker, left_hand, right_hand, frame.shape,
+                            input_time=capture.timestamp, frames=hand_frames)
         
-        # Actualizar física del juego
-        game.update()
+        # PYMUNK: Avanzar simulación de física y actualizar el juego
+        game.step_frame()
+        if server is not None:
+            server.publish(tick, game.get_state(), game.score)
+        if recorder is not None:
+            recorder.record(game)
+        tick += 1
         
-        # Crear frame del juego
-        game_frame = np.zeros((game.height, game.width, 3), dtype=np.uint8)
+        # Dibujar el juego sobre el buffer reutilizado, con el aviso de la fase del tiro
         game_frame = game.draw(game_frame)
+        draw_phase_hint(game, game_frame)
+        if probe is not None:
+            probe.mark('render')
+            probe.draw(game_frame)
         
-        if game.any_ball_moving():
-            msg = "BOLAS EN MOVIMIENTO..."
-            cv2.putText(game_frame, msg, (game.width//2 - 200, 150), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 100, 100), 3)
-        elif game.show_aim_vector:
-            # MODO PREVIEW - Azul claro
-            msg1 = "MODO PREVIEW (Mano Izq ABIERTA)"
-            msg2 = "Cierra mano izquierda para SELECCIONAR DIRECCION"
-            azul = (255, 200, 100)
-            cv2.putText(game_frame, msg1, (game.width//2 - 280, 140), 
-                       cv2.FONT_HERSHEY_DUPLEX, 1, azul, 3)
-            cv2.putText(game_frame, msg2, (game.width//2 - 340, 175), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
-        elif game.game_phase == 'aiming_direction':
-            # FASE 1 - Naranja/Azul
-            msg1 = "FASE 1: SELECCION DE DIRECCION"
-            msg2 = "Mueve mano DERECHA | Abre mano IZQ para FIJAR y pasar a FASE 2"
-            color = (255, 150, 0)
-            cv2.putText(game_frame, msg1, (game.width//2 - 280, 140), 
-                       cv2.FONT_HERSHEY_DUPLEX, 1, color, 3)
-            cv2.putText(game_frame, msg2, (game.width//2 - 380, 175), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
-        elif game.game_phase == 'aiming_power':
-            # FASE 2 - Rojo
-            msg1 = "FASE 2: AJUSTE DE POTENCIA"
-            msg2 = "Mueve mano DERECHA rapidamente para DISPARAR"
-            rojo = (0, 0, 255)
-            cv2.putText(game_frame, msg1, (game.width//2 - 280, 140), 
-                       cv2.FONT_HERSHEY_DUPLEX, 1, rojo, 3)
-            cv2.putText(game_frame, msg2, (game.width//2 - 320, 175), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
-        else:
-            msg1 = "MANO IZQUIERDA:"
-            msg2 = "ABIERTA = Preview  |  CERRADA = Seleccionar Direccion"
-            cv2.putText(game_frame, msg1, (game.width//2 - 180, 140), 
-                       cv2.FONT_HERSHEY_DUPLEX, 0.9, (255, 255, 255), 2)
-            cv2.putText(game_frame, msg2, (game.width//2 - 340, 175), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (150, 200, 255), 2)
+        # Aviso de carga (o de fallo) de la cámara y el modelo de manos
+        if not hands_ready:
+            msg = "SIN CAMARA / MANOS (pulsa I para jugar contra la IA)" if hand_input.failed else "CARGANDO MANOS..."
+            cv2.putText(game_frame, msg, (50, 100), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (100, 200, 255), 2)
         
         # Mostrar ventanas
-        cv2.imshow('Camara - Tracking de Manos', camera_display)
+        if hands_ready and args.single_window:
+            # Componer la miniatura de la cámara en la esquina inferior derecha
+            game_frame[preview_y:preview_y + PREVIEW_SIZE[1],
+                       preview_x:preview_x + PREVIEW_SIZE[0]] = preview
+            cv2.rectangle(game_frame, (preview_x - 2, preview_y - 2),
+                          (preview_x + PREVIEW_SIZE[0] + 1, preview_y + PREVIEW_SIZE[1] + 1),
+                          (255, 255, 255), 2)
+        elif hands_ready:
+            cv2.imshow('Camara - Tracking de Manos', camera_display)
         cv2.imshow('Juego de Billar', game_frame)
+        if probe is not None:
+            probe.frame_presented(game)
+        if exporter is not None:
+            inset = None
+            if args.video_camera and hands_ready and not args.single_window:
+                # En una sola ventana la miniatura ya está en game_frame
+                cv2.resize(camera_display, PREVIEW_SIZE, dst=preview, interpolation=cv2.INTER_AREA)
+                inset = preview
+            exporter.submit(game_frame, inset=inset)
         
         # Control de teclado
-        key = cv2.waitKey(1) & 0xFF
+        # (sin cámara que marque el ritmo, esperar lo justo hasta el siguiente frame para no acelerar la física)
+        key = pacer.wait_key(paced=not hands_ready) & 0xFF
+        timer.mark('first_frame')
+        # Informe de arranque cuando ya hay primer frame y las manos funcionan (o fallaron al cargar)
+        if not timer.reported and (hands_ready or hand_input.failed):
+            timer.report()
         if key == ord('q'):
             break
         elif key == ord('r'):
             game.reset()
-            print("Juego reiniciado!")
+            log_event(logger, 'game_reset')
+        elif key == ord('i') and not game.any_ball_moving():
+            shot = ai_player.play(game)
+            if shot is not None:
+                log_event(logger, 'ai_shot', power=shot.power, value=shot.value,
+                          simulations=shot.evaluated)
     
     # Limpieza
-    cap.release()
-    hand_tracker.release()
+    if probe is not None:
+        probe.report()
+    hand_input.release()
+    if server is not None:
+        server.stop()
+    if recorder is not None:
+        recorder.close()
+    if exporter is not None:
+        try:
+            exporter.close()
+        except Exception as error:
+            print(f"El vídeo {args.export_video} quedó incompleto: {error!r}")
+    stop_logging()
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
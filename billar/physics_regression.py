@@ -0,0 +1,248 @@
+"""
+Regresión de la física: tiros aleatorios (con semilla) por el motor sin ventana
+
+Cada tiro comprueba invariantes y presupuestos; si alguno falla el programa sale con código 1,
+así un ajuste de los números mágicos (damping, elasticidad, frenado de update_physics,
+velocity_scale...) que rompa la física o el rendimiento se detecta enseguida:
+  - ninguna bola se mete en las bandas: el centro queda a un radio o más de ellas (se comprueba
+    en la mesa plana, que la homografía lleva exactamente al trapecio table_3d de la pantalla)
+  - la energía (cinética + rotación) nunca aumenta de un frame al siguiente
+  - todo tiro acaba en reposo dentro del presupuesto de frames
+  - la simulación de cada tiro cabe en el presupuesto de tiempo
+  - los tiros de la referencia (physics_baseline.json) acaban en los mismos frames y posiciones,
+    dentro de una tolerancia: así se detectan cambios que no rompen ningún invariante
+    (p. ej. el damping, que el frenado de update_physics enmascara)
+
+Uso: python physics_regression.py [--shots 200] [--seed 1] [--max-frames 600] [--max-shot-ms 150]
+     python physics_regression.py --seed 1 --only 37      # repetir un tiro concreto
+     python physics_regression.py --update-baseline       # regrabar la referencia tras un cambio buscado
+También se ejecuta con pytest (test_physics_regression.py).
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from collections import namedtuple
+
+from billiard_game import BilliardGame
+from table_config import TABLES
+
+SHOT_MAX_FRAMES = 600       # 10 s de juego: todo tiro debe quedar en reposo antes
+SHOT_MAX_MS = 150.0         # Tiempo de simulación por tiro (solo los pasos de física)
+ENERGY_TOLERANCE = 1e-6     # Aumento relativo de energía tolerado por frame (ruido numérico)
+MIN_POWER = 1.0             # Potencias del juego (apply_shot)
+MAX_POWER = 20.0
+LAYOUTS = ('rack', 'scatter')
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'physics_baseline.json')
+BASELINE_SEED = 1
+BASELINE_SHOTS = 60
+BASELINE_FRAME_TOLERANCE = 0.05   # Desvío relativo tolerado de los frames hasta el reposo (mín. 3)
+BASELINE_POSITION_TOLERANCE = 5.0  # Unidades de mesa que puede desviarse cada bola al final
+
+ShotCase = namedtuple('ShotCase', ['index', 'table', 'layout', 'angle', 'power'])
+
+
+def _case_rng(seed, index, purpose):
+    """Generador propio de cada tiro: un tiro se reproduce solo con la semilla y su índice"""
+    return random.Random(f"{seed}:{index}:{purpose}")
+
+
+def random_case(seed, index, tables):
+    rng = _case_rng(seed, index, 'shot')
+    return ShotCase(
+        index=index,
+        table=rng.choice(tables),
+        layout=rng.choice(LAYOUTS),
+        angle=rng.uniform(0, 2 * math.pi),
+        power=rng.uniform(MIN_POWER, MAX_POWER),
+    )
+
+
+def _scatter(game, rng):
+    """Reparte las bolas al azar por la mesa, sin solaparse y lejos de las bandas"""
+    radius = game.ball_radius
+    margin = radius + 12
+    positions = {}
+    for number in game.ball_bodies:
+        for _ in range(200):
+            x = rng.uniform(margin, game.table_length - margin)
+            y = rng.uniform(margin, game.table_width - margin)
+            if all(math.hypot(x - px, y - py) > 2 * radius + 1 for px, py in positions.values()):
+                positions[number] = (x, y)
+                break
+    game.set_state(positions)
+
+
+def _energy(game):
+    return sum(body.kinetic_energy for body in game.ball_bodies.values())
+
+
+def run_case(case, seed, max_frames=SHOT_MAX_FRAMES, max_shot_ms=SHOT_MAX_MS):
+    """
+    Simula un tiro hasta el reposo comprobando los invariantes.
+
+    Returns:
+        tuple: (lista de fallos, frames simulados, ms de simulación, posiciones finales)
+    """
+    game = BilliardGame(width=1200, height=800, table=case.table)
+    game.verbose = False
+    if case.layout == 'scatter':
+        _scatter(game, _case_rng(seed, case.index, 'layout'))
+    game.apply_shot(math.cos(case.angle), math.sin(case.angle), case.power)
+
+    failures = {}
+    energy = _energy(game)
+    elapsed = 0.0
+    frames = 0
+    while frames < max_frames:
+        start = time.perf_counter()
+        game.step_frame()
+        elapsed += time.perf_counter() - start
+        frames += 1
+
+        new_energy = _energy(game)
+        if new_energy > energy * (1 + ENERGY_TOLERANCE) + 1e-9 and 'energy' not in failures:
+            failures['energy'] = (f"la energía aumentó {100 * (new_energy - energy) / max(energy, 1e-9):.3f}% "
+                                  f"en el frame {frames}")
+        energy = new_energy
+
+        radius = game.ball_radius
+        for number, body in game.ball_bodies.items():
+            x, y = body.position
+            # (las comparaciones también fallan con NaN)
+            inside = (radius <= x <= game.table_length - radius and
+                      radius <= y <= game.table_width - radius)
+            if not inside and 'bounds' not in failures:
+                failures['bounds'] = (f"la bola {number} se metió en la banda en ({x:.1f}, {y:.1f}) "
+                                      f"en el frame {frames}")
+
+        if not game.any_ball_moving():
+            break
+    else:
+        failures['rest'] = f"sin reposo tras {max_frames} frames (energía {energy:.1f})"
+
+    shot_ms = elapsed * 1000
+    if shot_ms > max_shot_ms:
+        failures['time'] = f"simulación de {shot_ms:.1f} ms (presupuesto {max_shot_ms:.0f} ms)"
+    return list(failures.values()), frames, shot_ms, game.get_state()
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Referencia grabada: {índice: {'frames': n, 'positions': {número: [x, y]}}} ({} si no existe)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        data = json.load(f)
+    return {int(index): entry for index, entry in data['cases'].items()}
+
+
+def save_baseline(cases, seed=BASELINE_SEED, tables=None, path=BASELINE_PATH):
+    """Graba la referencia: cases = {índice: (frames, posiciones)}"""
+    data = {
+        'seed': seed,
+        'tables': tables or list(TABLES),
+        'cases': {
+            str(index): {'frames': frames,
+                         'positions': {str(n): [round(x, 2), round(y, 2)] for n, (x, y) in sorted(positions.items())}}
+            for index, (frames, positions) in sorted(cases.items())
+        },
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1)
+        f.write('\n')
+
+
+def compare_baseline(entry, frames, positions):
+    """Fallos por desviarse de la referencia de un tiro (frames hasta el reposo y posiciones finales)"""
+    failures = []
+    expected_frames = entry['frames']
+    if abs(frames - expected_frames) > max(3, BASELINE_FRAME_TOLERANCE * expected_frames):
+        failures.append(f"reposo en {frames} frames (referencia {expected_frames})")
+
+    expected = {int(n): xy for n, xy in entry['positions'].items()}
+    if set(expected) != set(positions):
+        failures.append(f"bolas en la mesa {sorted(positions)} (referencia {sorted(expected)})")
+        return failures
+    for number, (x, y) in sorted(positions.items()):
+        ex, ey = expected[number]
+        if math.hypot(x - ex, y - ey) > BASELINE_POSITION_TOLERANCE:
+            failures.append(f"la bola {number} acabó en ({x:.1f}, {y:.1f}) (referencia ({ex:.1f}, {ey:.1f}))")
+            break
+    return failures
+
+
+def baseline_cases(seed=BASELINE_SEED, shots=BASELINE_SHOTS, tables=None):
+    """Casos de la referencia (los mismos que graba --update-baseline)"""
+    tables = tables or list(TABLES)
+    return [random_case(seed, index, tables) for index in range(shots)]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regresión de la física con tiros aleatorios")
+    parser.add_argument('--shots', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--only', type=int, default=None, metavar='N', help="Repetir solo el tiro N")
+    parser.add_argument('--tables', default=','.join(TABLES), help="Mesas a probar (separadas por comas)")
+    parser.add_argument('--max-frames', type=int, default=SHOT_MAX_FRAMES,
+                        help="Presupuesto de frames hasta el reposo por tiro")
+    parser.add_argument('--max-shot-ms', type=float, default=SHOT_MAX_MS,
+                        help="Presupuesto de tiempo de simulación por tiro")
+    parser.add_argument('--fail-fast', action='store_true', help="Parar en el primer tiro que falle")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help=f"Regrabar la referencia ({BASELINE_SHOTS} tiros, semilla {BASELINE_SEED}) "
+                             "tras un cambio intencionado de la física")
+    args = parser.parse_args()
+
+    tables = args.tables.split(',')
+    if args.update_baseline:
+        cases = {}
+        for case in baseline_cases():
+            failures, frames, _, positions = run_case(case, BASELINE_SEED)
+            if failures:
+                raise SystemExit(f"tiro {case.index} fallido, no se graba la referencia: {'; '.join(failures)}")
+            cases[case.index] = (frames, positions)
+        save_baseline(cases)
+        print(f"Referencia de {len(cases)} tiros grabada en {BASELINE_PATH}")
+        return
+
+    # La referencia solo vale para los tiros con los que se grabó
+    baseline = {}
+    if args.seed == BASELINE_SEED and tables == list(TABLES):
+        baseline = load_baseline()
+    indices = [args.only] if args.only is not None else range(args.shots)
+    frame_counts = []
+    shot_times = []
+    failed = 0
+    for index in indices:
+        case = random_case(args.seed, index, tables)
+        failures, frames, shot_ms, positions = run_case(case, args.seed, args.max_frames, args.max_shot_ms)
+        if index in baseline:
+            failures += compare_baseline(baseline[index], frames, positions)
+        frame_counts.append(frames)
+        shot_times.append(shot_ms)
+        if failures:
+            failed += 1
+            print(f"FALLO tiro {index} ({case.table}, {case.layout}, ángulo {math.degrees(case.angle):.1f}°, "
+                  f"potencia {case.power:.2f}): {'; '.join(failures)}")
+            print(f"  repetir con: python physics_regression.py --seed {args.seed} --only {index}")
+            if args.fail_fast:
+                break
+
+    print(f"{len(frame_counts)} tiros, {failed} fallidos | frames hasta reposo p50 "
+          f"{_percentile(frame_counts, 0.5)} / p95 {_percentile(frame_counts, 0.95)} / máx {max(frame_counts)} | "
+          f"ms por tiro p50 {_percentile(shot_times, 0.5):.1f} / p95 {_percentile(shot_times, 0.95):.1f} "
+          f"/ máx {max(shot_times):.1f}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
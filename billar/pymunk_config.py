@@ -6,6 +6,12 @@ Configuración de PyMunk para el juego de billar
 GRAVITY = (0, 0)  # Sin gravedad (billar es horizontal)
 DAMPING = 0.88  # ANTES 0.70 → AHORA 0.88 (fricción brutal)
 
+# Mesa plana donde corre la física (unidades de mesa, proporción 2:1)
+TABLE_LENGTH = 900  # Largo (eje x, de izquierda a derecha)
+TABLE_WIDTH = 450   # Ancho (eje y, del fondo a la banda cercana)
+CORNER_POCKET_RADIUS = 40  # Troneras de esquina
+SIDE_POCKET_RADIUS = 36    # Troneras centrales
+
 # Propiedades de las bolas
 BALL_RADIUS = 15  # Radio visual de las bolas
 BALL_MASS = 0.12  # ANTES 0.17 → AHORA 0.12 (120g más ágil)
@@ -16,6 +22,10 @@ BALL_FRICTION = 1.1  # ANTES 0.8 → AHORA 1.1 (máximo agarre)
 WALL_ELASTICITY = 0.75  # ANTES 0.65 → AHORA 0.75 (rebote mínimo)
 WALL_FRICTION = 1.2  # ANTES 0.9 → AHORA 1.2 (paredes agarran más)
 
+# Con esta cantidad de bolas o más se usa hash espacial en vez del árbol por defecto
+SPATIAL_HASH_MIN_BALLS = 30
+
 # Simulación
 SIMULATION_DT = 1/60  # Delta time por frame (60 FPS)
+PHYSICS_DT = 1/120  # Paso de física: todos los pasos del espacio usan el mismo dt
 SIMULATION_ITERATIONS = 20  # ANTES 5 → AHORA 20 (mayor precisión)
@@ -0,0 +1,227 @@
+"""
+Grabación y reproducción de partidas en un formato binario compacto con keyframes indexados
+
+Formato del archivo:
+    cabecera  (magic, versión, intervalo de keyframes, nombre de la mesa)
+    registros (uno por tick, ver _FLAG_*)
+    índice    (offset u64 de cada keyframe: el keyframe k es el tick k * intervalo)
+    pie       (offset del índice, número de ticks, magic)
+"""
+import argparse
+import mmap
+import struct
+
+from state_codec import quantize_state, dequantize_state, encode_keyframe, encode_delta, apply_delta
+from table_config import TABLES, DEFAULT_TABLE
+
+REPLAY_MAGIC = b'BRPL'
+REPLAY_FOOTER_MAGIC = b'BRPX'
+REPLAY_VERSION = 2        # 2: la cabecera guarda la mesa
+KEYFRAME_INTERVAL = 300  # Ticks entre keyframes (5 s a 60 FPS)
+
+_HEADER = struct.Struct('<4sBHB')  # ... + longitud del nombre de la mesa (el nombre va a continuación)
+_FOOTER = struct.Struct('<QI4s')
+_INDEX_ENTRY = struct.Struct('<Q')
+_SCORE = struct.Struct('<i')
+
+# Flags del byte inicial de cada registro (0 = nada cambió en este tick)
+_FLAG_KEYFRAME = 0x01
+_FLAG_SCORE = 0x02
+_FLAG_DELTA = 0x04
+
+
+class ReplayRecorder:
+    def __init__(self, path, table=DEFAULT_TABLE, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        name = table.encode('utf-8')
+        self._file = open(path, 'wb', buffering=1 << 16)
+        self._file.write(_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, keyframe_interval, len(name)) + name)
+        self._offset = _HEADER.size + len(name)
+        self._index = []
+        self._last_state = {}
+        self._last_score = 0
+        self.tick_count = 0
+
+    def record(self, game):
+        """Guarda el estado del juego para el siguiente tick"""
+        self.record_state(game.get_state(), game.score)
+
+    def record_state(self, positions, score):
+        """Guarda un tick a partir de posiciones {número: (x, y)} y puntuación"""
+        state = quantize_state(positions)
+        if self.tick_count % self.keyframe_interval == 0:
+            self._index.append(self._offset)
+            record = bytes((_FLAG_KEYFRAME | _FLAG_SCORE,)) + _SCORE.pack(score) + encode_keyframe(state)
+        else:
+            flags = 0
+            parts = []
+            if score != self._last_score:
+                flags |= _FLAG_SCORE
+                parts.append(_SCORE.pack(score))
+            if state != self._last_state:
+                flags |= _FLAG_DELTA
+                parts.append(encode_delta(self._last_state, state))
+            record = bytes((flags,)) + b''.join(parts)
+
+        self._file.write(record)
+        self._offset += len(record)
+        self._last_state = state
+        self._last_score = score
+        self.tick_count += 1
+
+    def close(self):
+        """Escribe el índice de keyframes y el pie, y cierra el archivo"""
+        if self._file.closed:
+            return
+        index_offset = self._offset
+        for offset in self._index:
+            self._file.write(_INDEX_ENTRY.pack(offset))
+        self._file.write(_FOOTER.pack(index_offset, self.tick_count, REPLAY_FOOTER_MAGIC))
+        self._file.close()
+
+
+class ReplayReader:
+    """Lee una grabación mapeada en memoria; state_at(tick) cuesta a lo sumo un intervalo de registros"""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.keyframe_interval, name_length = _HEADER.unpack_from(self._data, 0)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} no es una grabación de billar válida (o es de otra versión)")
+        self._records_start = _HEADER.size + name_length
+        self.table = self._data[_HEADER.size:self._records_start].decode('utf-8')  # Mesa de la partida
+
+        footer_magic = None
+        if len(self._data) >= self._records_start + _FOOTER.size:
+            index_offset, tick_count, footer_magic = _FOOTER.unpack_from(self._data, len(self._data) - _FOOTER.size)
+        if footer_magic == REPLAY_FOOTER_MAGIC:
+            self.tick_count = tick_count
+            self._index_offset = index_offset
+            self._index = None
+            self._records_end = index_offset
+        else:
+            # Grabación sin cerrar (p. ej. el juego se cerró de golpe): reconstruir el índice
+            self._records_end = len(self._data)
+            self._index = []
+            self.tick_count = self._scan()
+
+    def __len__(self):
+        return self.tick_count
+
+    def _keyframe_offset(self, number):
+        if self._index is not None:
+            return self._index[number]
+        return _INDEX_ENTRY.unpack_from(self._data, self._index_offset + number * _INDEX_ENTRY.size)[0]
+
+    def _read_record(self, offset, state, score):
+        """Aplica el registro en `offset` sobre `state`; devuelve (offset siguiente, puntuación)"""
+        flags = self._data[offset]
+        offset += 1
+        if flags & _FLAG_SCORE:
+            score = _SCORE.unpack_from(self._data, offset)[0]
+            offset += _SCORE.size
+        if flags & _FLAG_KEYFRAME:
+            state.clear()
+            offset = apply_delta(self._data, offset, state)
+        elif flags & _FLAG_DELTA:
+            offset = apply_delta(self._data, offset, state)
+        return offset, score
+
+    def _scan(self):
+        """Recorre los registros de principio a fin para rehacer el índice"""
+        offset = self._records_start
+        state = {}
+        score = 0
+        ticks = 0
+        while offset < self._records_end:
+            if ticks % self.keyframe_interval == 0:
+                self._index.append(offset)
+            try:
+                offset, score = self._read_record(offset, state, score)
+            except (struct.error, IndexError, KeyError):
+                break  # Último registro a medio escribir
+            ticks += 1
+        return ticks
+
+    def state_at(self, tick):
+        """
+        Estado en un tick cualquiera: salta al keyframe anterior y aplica sus deltas.
+
+        Returns:
+            tuple: (posiciones {número: (x, y)} en coordenadas de mesa, puntuación)
+        """
+        if not 0 <= tick < self.tick_count:
+            raise IndexError(f"tick {tick} fuera de la grabación (0-{self.tick_count - 1})")
+        keyframe = tick // self.keyframe_interval
+        offset = self._keyframe_offset(keyframe)
+        state = {}
+        score = 0
+        for _ in range(tick - keyframe * self.keyframe_interval + 1):
+            offset, score = self._read_record(offset, state, score)
+        return dequantize_state(state), score
+
+    def iter_states(self, start=0):
+        """Recorre la grabación en orden desde `start` (un registro por tick)"""
+        if start >= self.tick_count:
+            return
+        keyframe = start // self.keyframe_interval
+        offset = self._keyframe_offset(keyframe)
+        state = {}
+        score = 0
+        for tick in range(keyframe * self.keyframe_interval, self.tick_count):
+            offset, score = self._read_record(offset, state, score)
+            if tick >= start:
+                yield tick, dequantize_state(state), score
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+
+def main():
+    """Visor de grabaciones: ESPACIO pausa, A/D retroceden/avanzan 5 s, Q sale"""
+    import cv2
+    import numpy as np
+    from billiard_game import BilliardGame
+
+    parser = argparse.ArgumentParser(description="Visor de grabaciones de billar")
+    parser.add_argument('path')
+    parser.add_argument('--table', default=None, choices=sorted(TABLES),
+                        help="Forzar otra mesa (por defecto, la guardada en la grabación)")
+    args = parser.parse_args()
+
+    reader = ReplayReader(args.path)
+    game = BilliardGame(width=1200, height=800, table=args.table or reader.table)
+    frame = np.zeros((game.height, game.width, 3), dtype=np.uint8)
+    seek_step = 5 * 60
+    tick = 0
+    paused = False
+
+    while reader.tick_count:
+        positions, score = reader.state_at(tick)
+        game.set_state(positions)
+        game.score = score
+        game.draw(frame)
+        cv2.putText(frame, f"Tick {tick}/{reader.tick_count - 1}", (game.width - 320, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        cv2.imshow('Repeticion - Billar', frame)
+
+        key = cv2.waitKey(16) & 0xFF
+        if key == ord('q'):
+            break
+        elif key == ord(' '):
+            paused = not paused
+        elif key == ord('a'):
+            tick = max(0, tick - seek_step)
+        elif key == ord('d'):
+            tick = min(reader.tick_count - 1, tick + seek_step)
+        elif not paused:
+            tick = min(reader.tick_count - 1, tick + 1)
+
+    reader.close()
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
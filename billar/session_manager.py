@@ -0,0 +1,364 @@
+"""
+Varias mesas independientes en un mismo proceso (modo arcade)
+
+Cada mesa tiene su partida, su cámara con su detector de manos y su estado de gestos.
+Un pool de hilos reparte la detección, la física y el dibujo de las mesas (OpenCV, MediaPipe
+y Chipmunk sueltan el GIL); el hilo principal solo compone el mosaico y lee el teclado, a un
+ritmo fijo para no quitarles el GIL. Las mesas comparten un único jugador automático (su mesa
+auxiliar y su caché): busca para una mesa cada vez. Una mesa lenta (p. ej. con la IA pensando)
+no frena a las demás: su casilla conserva el último frame.
+"""
+import argparse
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from billiard_game import BilliardGame
+from ai_player import AIPlayer
+from camera_capture import parse_resolution
+from frame_timing import FramePacer
+from game_log import get_logger, log_event, start_logging, stop_logging
+from gesture_control import GestureState, draw_phase_hint
+from inference_tuner import InferenceTuner, INFERENCE_TARGET_MS
+from startup import HandInputLoader
+from table_config import TABLES, DEFAULT_TABLE
+
+logger = get_logger('sessions')
+
+TILE_SIZE = (600, 400)      # Casilla de cada mesa en el mosaico (ancho, alto)
+FRAME_INTERVAL = 1 / 60     # Ritmo de las mesas sin cámara (en las demás lo marca la cámara)
+DEMO_PAUSE_FRAMES = 90      # Frames en reposo antes de que tire una mesa de demostración
+DEMO_AI_BUDGET = 0.25       # Segundos de búsqueda por tiro de demostración (la IA compite por el GIL)
+STATS_INTERVAL = 10.0       # Segundos entre informes de rendimiento por mesa
+POLL_FPS = 120              # Ritmo del hilo principal: recoge frames, lanza mesas y lee el teclado
+MAX_TABLE_ERRORS = 3        # Errores seguidos de una mesa antes de darla por caída
+
+
+class TableSession:
+    """Una mesa: partida, entrada de manos, gestos e IA propios"""
+
+    def __init__(self, number, table=DEFAULT_TABLE, camera_index=None, camera_size=(640, 480),
+                 inference_ms=INFERENCE_TARGET_MS, demo=False):
+        self.number = number
+        self.game = BilliardGame(width=1200, height=800, table=table)
+        # Jugador automático propio; SessionManager lo sustituye por uno compartido (share_ai)
+        self.ai_player = AIPlayer()
+        self.ai_lock = threading.Lock()
+        self.gestures = GestureState()
+        self.tuner = InferenceTuner(target_ms=inference_ms)
+        self.hand_input = None
+        if camera_index is not None:
+            self.hand_input = HandInputLoader(camera_index, width=camera_size[0], height=camera_size[1])
+        self.demo = demo  # Sin manos, la mesa juega sola contra la IA
+        self.frame = np.zeros((self.game.height, self.game.width, 3), dtype=np.uint8)
+
+        # Peticiones del hilo principal (teclado): se atienden en el siguiente frame de la mesa
+        self.ai_requested = False
+        self.reset_requested = False
+
+        self.next_due = 0.0
+        self.idle_frames = 0
+        self.errors = 0     # Frames fallidos seguidos; con MAX_TABLE_ERRORS la mesa se detiene
+        self.failed = False
+        self.frames = 0     # Frames y segundos de trabajo desde el último informe
+        self.busy = 0.0
+
+    def share_ai(self, ai_player, ai_lock):
+        """Usa un jugador automático común a varias mesas (el lock permite una búsqueda a la vez)"""
+        self.ai_player = ai_player
+        self.ai_lock = ai_lock
+
+    def start(self):
+        if self.hand_input is not None:
+            self.hand_input.start()
+
+    @property
+    def hands_ready(self):
+        return self.hand_input is not None and self.hand_input.ready
+
+    def due(self, now):
+        """¿Toca lanzar otro frame? Con manos espera la cámara; sin ellas va a FRAME_INTERVAL"""
+        if self.failed:
+            return False
+        if self.hands_ready:
+            return True
+        if now < self.next_due:
+            return False
+        self.next_due = max(self.next_due + FRAME_INTERVAL, now - FRAME_INTERVAL)
+        return True
+
+    def run_frame(self):
+        """
+        Un frame completo de la mesa (se ejecuta en un hilo del pool).
+
+        Returns:
+            float: segundos de trabajo
+        """
+        start = time.perf_counter()
+        game = self.game
+
+        if self.reset_requested:
+            self.reset_requested = False
+            game.reset()
+            self.gestures.reset()
+
+        hands_ready = self.hands_ready
+        if hands_ready:
+            frame, rgb_frame = self.hand_input.capture.read()
+            if frame is not None:
+                hand_tracker = self.hand_input.hand_tracker
+                results, hand_frames = self.tuner.process(hand_tracker, rgb_frame)
+                if hand_frames:  # Un resultado reutilizado daría velocidad nula y luego una falsa ráfaga
+                    left_hand, right_hand = hand_tracker.get_hand_data(results, frame.shape)
+                    self.gestures.update(game, hand_tracker, left_hand, right_hand, frame.shape,
+                                         input_time=self.hand_input.capture.timestamp, frames=hand_frames)
+
+        if game.any_ball_moving():
+            self.idle_frames = 0
+            self.ai_requested = False
+        else:
+            self.idle_frames += 1
+            demo_turn = self.demo and not hands_ready and self.idle_frames >= DEMO_PAUSE_FRAMES
+            if (self.ai_requested or demo_turn) and self._ai_shot(demo_turn):
+                self.ai_requested = False
+
+        game.step_frame()
+
+        game.draw(self.frame)
+        draw_phase_hint(game, self.frame)
+        self._draw_status(hands_ready)
+        return time.perf_counter() - start
+
+    def _ai_shot(self, demo_turn):
+        """
+        Tiro de la IA si el jugador automático está libre.
+
+        Returns:
+            bool: False si otra mesa lo está usando (se reintenta en el siguiente frame)
+        """
+        if not self.ai_lock.acquire(blocking=False):
+            return False
+        try:
+            shot = self.ai_player.play(self.game, DEMO_AI_BUDGET if demo_turn else None)
+            timed_out = self.ai_player.timed_out
+        finally:
+            self.ai_lock.release()
+        self.idle_frames = 0
+        if shot is None:
+            if timed_out:
+                # La búsqueda no acabó ni una simulación (mesas compitiendo por el GIL): reintentar
+                log_event(logger, 'ai_timeout', table=self.number)
+            elif demo_turn:
+                # Mesa de demostración sin bolas que tirar: empezar otra partida
+                self.game.reset()
+            return True
+        log_event(logger, 'ai_shot', table=self.number, power=shot.power, value=shot.value,
+                  simulations=shot.evaluated)
+        return True
+
+    def _draw_status(self, hands_ready):
+        """Número de mesa y estado de la cámara"""
+        cv2.putText(self.frame, f"MESA {self.number}", (self.game.width - 260, 60),
+                    cv2.FONT_HERSHEY_DUPLEX, 1.5, (255, 255, 255), 3)
+        if hands_ready:
+            return
+        if self.hand_input is None or self.hand_input.failed:
+            msg = "DEMOSTRACION" if self.demo else "SIN CAMARA (I: tiro de la IA)"
+        else:
+            msg = "CARGANDO MANOS..."
+        cv2.putText(self.frame, msg, (50, 100),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (100, 200, 255), 2)
+
+    def frame_failed(self, error):
+        """Un frame lanzó una excepción: reiniciar la partida o, si se repite, detener la mesa"""
+        self.errors += 1
+        self.failed = self.errors >= MAX_TABLE_ERRORS
+        self.reset_requested = True
+        log_event(logger, 'table_error', level=logging.ERROR, table=self.number,
+                  error=repr(error), errors=self.errors, stopped=self.failed)
+        if self.failed:
+            self.frame[:] = 0
+            cv2.putText(self.frame, f"MESA {self.number}: ERROR", (50, 100),
+                        cv2.FONT_HERSHEY_DUPLEX, 1.5, (0, 0, 255), 3)
+
+    def release(self):
+        if self.hand_input is not None:
+            self.hand_input.release()
+
+
+class SessionManager:
+    """Reparte las mesas en un pool de hilos y las compone en un mosaico"""
+
+    def __init__(self, sessions, workers=None, tile_size=TILE_SIZE):
+        self.sessions = sessions
+        self.ai_player = AIPlayer()
+        ai_lock = threading.Lock()
+        for session in sessions:
+            session.share_ai(self.ai_player, ai_lock)
+        self.tile_size = tile_size
+        self.columns = math.ceil(math.sqrt(len(sessions)))
+        rows = math.ceil(len(sessions) / self.columns)
+        tile_width, tile_height = tile_size
+
+        # Casillas: vistas del mosaico donde se reduce directamente el último frame de cada mesa
+        self.mosaic = np.zeros((rows * tile_height, self.columns * tile_width, 3), dtype=np.uint8)
+        self.tiles = []
+        for index in range(len(sessions)):
+            x, y = self.tile_origin(index)
+            self.tiles.append(self.mosaic[y:y + tile_height, x:x + tile_width])
+        # Copia que se muestra: el marco de la mesa elegida no debe quedar pintado en el mosaico
+        self.display = np.empty_like(self.mosaic)
+
+        self.pool = ThreadPoolExecutor(max_workers=workers or len(sessions), thread_name_prefix='mesa')
+        self._futures = [None] * len(sessions)
+        self._stats_time = time.perf_counter()
+        self.selected = 0
+
+    def tile_origin(self, index):
+        row, column = divmod(index, self.columns)
+        return column * self.tile_size[0], row * self.tile_size[1]
+
+    def start(self):
+        for session in self.sessions:
+            session.start()
+
+    def poll(self):
+        """
+        Recoge las mesas que terminaron su frame, lo copia al mosaico y lanza las que tocan.
+
+        Returns:
+            bool: True si alguna casilla del mosaico cambió
+        """
+        now = time.perf_counter()
+        changed = False
+        for index, session in enumerate(self.sessions):
+            future = self._futures[index]
+            if future is not None:
+                if not future.done():
+                    continue  # Esta mesa sigue trabajando: se muestra su frame anterior
+                try:
+                    session.busy += future.result()
+                except Exception as error:
+                    # Un fallo de una mesa no debe tumbar a las demás
+                    session.frame_failed(error)
+                else:
+                    session.errors = 0
+                session.frames += 1
+                cv2.resize(session.frame, self.tile_size, dst=self.tiles[index],
+                           interpolation=cv2.INTER_AREA)
+                self._futures[index] = None
+                changed = True
+            if session.due(now):
+                self._futures[index] = self.pool.submit(session.run_frame)
+
+        if now - self._stats_time >= STATS_INTERVAL:
+            self._report(now)
+        return changed
+
+    def _report(self, now):
+        elapsed = now - self._stats_time
+        self._stats_time = now
+        for session in self.sessions:
+            log_event(logger, 'session_stats', table=session.number, fps=session.frames / elapsed,
+                      frame_ms=session.busy * 1000 / max(session.frames, 1),
+                      hands=session.hands_ready, inference_level=session.tuner.index)
+            session.frames = 0
+            session.busy = 0.0
+
+    def run(self):
+        """
+        Bucle de la ventana: mosaico de mesas y teclado.
+
+        Va a POLL_FPS (waitKey duerme sin el GIL) y solo vuelve a mostrar el mosaico si cambió.
+        """
+        self.start()
+        tile_width, tile_height = self.tile_size
+        pacer = FramePacer(fps=POLL_FPS)
+        dirty = True
+        try:
+            while True:
+                if self.poll():
+                    dirty = True
+                if dirty:
+                    np.copyto(self.display, self.mosaic)
+                    x, y = self.tile_origin(self.selected)
+                    cv2.rectangle(self.display, (x + 1, y + 1), (x + tile_width - 2, y + tile_height - 2),
+                                  (0, 255, 255), 3)
+                    cv2.imshow('Billar - Mesas', self.display)
+                    dirty = False
+
+                key = pacer.wait_key() & 0xFF
+                if key == ord('q'):
+                    break
+                elif ord('1') <= key < ord('1') + len(self.sessions):
+                    self.selected = key - ord('1')
+                    dirty = True
+                elif key == ord('r'):
+                    self.sessions[self.selected].reset_requested = True
+                elif key == ord('i'):
+                    self.sessions[self.selected].ai_requested = True
+        finally:
+            self.close()
+
+    def close(self):
+        """Espera los frames en curso y libera cámaras y detectores"""
+        self.pool.shutdown(wait=True)
+        for session in self.sessions:
+            session.release()
+
+
+def _camera_list(text):
+    """'0,1,2' → [0, 1, 2]; 'none' → sin cámaras"""
+    if text.lower() == 'none':
+        return []
+    try:
+        return [int(value) for value in text.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"lista de cámaras no válida: {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Varias mesas de billar en un mismo proceso")
+    parser.add_argument('--tables', type=int, default=4, help="Número de mesas")
+    parser.add_argument('--table', default=DEFAULT_TABLE, choices=sorted(TABLES),
+                        help="Mesa y reglas (ver table_config.py)")
+    parser.add_argument('--cameras', type=_camera_list, default=None,
+                        help="Cámara de cada mesa, p. ej. 0,1,2,3 ('none' para ninguna). "
+                             "Por defecto la mesa N usa la cámara N-1")
+    parser.add_argument('--camera-size', type=parse_resolution, default=(640, 480), metavar='ANCHOxALTO',
+                        help="Resolución pedida a las cámaras")
+    parser.add_argument('--inference-ms', type=float, default=INFERENCE_TARGET_MS,
+                        help="Coste objetivo de la detección de manos por frame y mesa")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Hilos del pool (por defecto, uno por mesa)")
+    parser.add_argument('--demo', action='store_true',
+                        help="Las mesas sin cámara juegan solas contra la IA")
+    parser.add_argument('--log-level', default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    args = parser.parse_args()
+
+    start_logging(getattr(logging, args.log_level))
+    cameras = args.cameras if args.cameras is not None else list(range(args.tables))
+    sessions = [
+        TableSession(number + 1, table=args.table,
+                     camera_index=cameras[number] if number < len(cameras) else None,
+                     camera_size=args.camera_size, inference_ms=args.inference_ms, demo=args.demo)
+        for number in range(args.tables)
+    ]
+
+    print(f"=== {args.tables} MESAS DE BILLAR ===")
+    print(f"1-{args.tables}: Seleccionar mesa | I: Tiro de la IA | R: Reiniciar | Q: Salir")
+    try:
+        SessionManager(sessions, workers=args.workers).run()
+    finally:
+        stop_logging()
+        cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
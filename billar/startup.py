@@ -0,0 +1,84 @@
+"""
+Arranque rápido: la mesa se dibuja enseguida y la cámara + MediaPipe se cargan en segundo plano
+"""
+import logging
+import threading
+import time
+
+from game_log import get_logger, log_event
+
+logger = get_logger('startup')
+
+
+class StartupTimer:
+    """Apunta hitos del arranque (ms desde el inicio del proceso) y los reporta una vez"""
+
+    def __init__(self, start_time):
+        self.start_time = start_time
+        self.marks = {}
+        self.reported = False
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = (time.perf_counter() - self.start_time) * 1000
+
+    def report(self):
+        if self.reported:
+            return
+        self.reported = True
+        log_event(logger, 'startup_report', **{f'{name}_ms': value for name, value in self.marks.items()})
+
+
+class HandInputLoader:
+    """Abre la cámara y construye el HandTracker (importa MediaPipe) en un hilo aparte"""
+
+    def __init__(self, camera_index=0, width=640, height=480, timer=None):
+        self.camera_index = camera_index
+        self.width = width
+        self.height = height
+        self.timer = timer
+        self.capture = None
+        self.hand_tracker = None
+        self.error = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._load, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    @property
+    def ready(self):
+        """True cuando cámara y tracker están listos para usarse"""
+        return self._done.is_set() and self.error is None
+
+    @property
+    def failed(self):
+        return self._done.is_set() and self.error is not None
+
+    def _load(self):
+        try:
+            from camera_capture import CameraCapture
+            self.capture = CameraCapture(self.camera_index, width=self.width, height=self.height)
+            if not self.capture.cap.isOpened():
+                raise RuntimeError(f"no se pudo abrir la cámara {self.camera_index}")
+            if self.timer:
+                self.timer.mark('camera_open')
+
+            from hand_tracking import HandTracker
+            self.hand_tracker = HandTracker()
+            if self.timer:
+                self.timer.mark('hand_tracker_ready')
+        except Exception as exc:  # Sin cámara o sin MediaPipe: el juego sigue sin manos
+            self.error = exc
+            log_event(logger, 'hand_input_failed', logging.WARNING, error=repr(exc))
+        finally:
+            self._done.set()
+
+    def release(self):
+        """Libera cámara y tracker si se llegaron a crear"""
+        if not self._done.is_set():
+            return  # Sigue cargando: el hilo es daemon y muere con el proceso
+        if self.capture is not None:
+            self.capture.release()
+        if self.hand_tracker is not None:
+            self.hand_tracker.release()
@@ -0,0 +1,98 @@
+"""
+Codificación compacta del estado de las bolas (posiciones cuantizadas y deltas)
+"""
+import struct
+
+POSITION_SCALE = 4      # Cuantización: 1/4 de unidad de mesa
+MAX_QUANTIZED = 0xFFFF  # Las coordenadas cuantizadas caben en 16 bits
+RELATIVE_FLAG = 0x80    # Bit alto del número de bola: delta relativo de 8 bits
+
+_COUNTS = struct.Struct('<BB')          # (bolas cambiadas, bolas quitadas)
+_ABSOLUTE = struct.Struct('<BHH')       # (número, x, y)
+_RELATIVE = struct.Struct('<Bbb')       # (número | RELATIVE_FLAG, dx, dy)
+
+
+def quantize_state(positions):
+    """Cuantiza {número: (x, y)} en coordenadas de mesa a enteros de 16 bits"""
+    quantized = {}
+    for number, (x, y) in positions.items():
+        qx = min(max(int(round(x * POSITION_SCALE)), 0), MAX_QUANTIZED)
+        qy = min(max(int(round(y * POSITION_SCALE)), 0), MAX_QUANTIZED)
+        quantized[number] = (qx, qy)
+    return quantized
+
+
+def dequantize_state(quantized):
+    """Inverso de quantize_state: {número: (x, y)} en coordenadas de mesa"""
+    return {number: (qx / POSITION_SCALE, qy / POSITION_SCALE) for number, (qx, qy) in quantized.items()}
+
+
+def encode_keyframe(quantized):
+    """Estado completo: todas las bolas con posición absoluta"""
+    parts = [_COUNTS.pack(len(quantized), 0)]
+    for number, (qx, qy) in quantized.items():
+        parts.append(_ABSOLUTE.pack(number, qx, qy))
+    return b''.join(parts)
+
+
+def decode_keyframe(buffer, offset=0):
+    """
+    Lee un bloque de encode_keyframe.
+
+    Returns:
+        tuple: (estado cuantizado, offset justo después del bloque)
+    """
+    quantized = {}
+    offset = apply_delta(buffer, offset, quantized)
+    return quantized, offset
+
+
+def encode_delta(previous, current):
+    """
+    Cambios entre dos estados cuantizados.
+
+    Solo se escriben las bolas que se movieron (con dx/dy de 8 bits si caben) y las
+    que desaparecieron.
+    """
+    removed = [number for number in previous if number not in current]
+    parts = []
+    for number, (qx, qy) in current.items():
+        old = previous.get(number)
+        if old == (qx, qy):
+            continue
+        if old is not None:
+            dx, dy = qx - old[0], qy - old[1]
+            if -128 <= dx <= 127 and -128 <= dy <= 127:
+                parts.append(_RELATIVE.pack(number | RELATIVE_FLAG, dx, dy))
+                continue
+        parts.append(_ABSOLUTE.pack(number, qx, qy))
+
+    return _COUNTS.pack(len(parts), len(removed)) + bytes(removed) + b''.join(parts)
+
+
+def apply_delta(buffer, offset, quantized):
+    """
+    Aplica sobre `quantized` (in place) un bloque de encode_delta/encode_keyframe.
+
+    Returns:
+        int: offset justo después del bloque leído
+    """
+    changed, removed = _COUNTS.unpack_from(buffer, offset)
+    offset += _COUNTS.size
+    for number in buffer[offset:offset + removed]:
+        quantized.pop(number, None)
+    offset += removed
+
+    for _ in range(changed):
+        number = buffer[offset]
+        if number & RELATIVE_FLAG:
+            _, dx, dy = _RELATIVE.unpack_from(buffer, offset)
+            number &= ~RELATIVE_FLAG
+            qx, qy = quantized[number]
+            quantized[number] = (qx + dx, qy + dy)
+            offset += _RELATIVE.size
+        else:
+            _, qx, qy = _ABSOLUTE.unpack_from(buffer, offset)
+            quantized[number] = (qx, qy)
+            offset += _ABSOLUTE.size
+    return offset
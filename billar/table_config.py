@@ -0,0 +1,155 @@
+"""
+Configuración declarativa de mesas y reglas (tamaño, troneras, colocación de bolas)
+
+Las posiciones se expresan como fracciones de la mesa plana: (fx, fy) con fx de la
+banda izquierda (0) a la derecha (1) y fy de la banda del fondo (0) a la cercana (1).
+Cada mesa se compila una sola vez a las estructuras que usa BilliardGame.
+"""
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from pymunk_config import BALL_RADIUS, TABLE_LENGTH, TABLE_WIDTH, CORNER_POCKET_RADIUS, SIDE_POCKET_RADIUS
+
+DEFAULT_TABLE = 'pool'
+
+# Troneras estándar: cuatro esquinas y dos centrales en las bandas largas
+SIX_POCKETS = [
+    ((0, 1), 'corner'), ((1, 1), 'corner'),
+    ((0, 0), 'corner'), ((1, 0), 'corner'),
+    ((0.5, 1), 'side'), ((0.5, 0), 'side'),
+]
+
+POOL_COLORS = [
+    (255, 200, 0),   # 1 - Amarillo
+    (0, 100, 200),   # 2 - Azul
+    (255, 50, 50),   # 3 - Rojo
+    (150, 50, 150),  # 4 - Púrpura
+    (255, 140, 0),   # 5 - Naranja
+    (0, 150, 50),    # 6 - Verde
+    (139, 69, 19),   # 7 - Marrón
+    (0, 0, 0),       # 8 - Negro
+    (255, 200, 0),   # 9 - Amarillo rayado
+    (0, 100, 200),   # 10 - Azul rayado
+    (255, 50, 50),   # 11 - Rojo rayado
+    (150, 50, 150),  # 12 - Púrpura rayado
+    (255, 140, 0),   # 13 - Naranja rayado
+    (0, 150, 50),    # 14 - Verde rayado
+]
+
+SNOOKER_RED = (0, 0, 220)
+
+TABLES = {
+    'pool': {
+        'size': (TABLE_LENGTH, TABLE_WIDTH),
+        'ball_radius': BALL_RADIUS,
+        'pockets': SIX_POCKETS,
+        'pocket_radius': {'corner': CORNER_POCKET_RADIUS, 'side': SIDE_POCKET_RADIUS},
+        'cue_spot': (0.5, 0.8),
+        'cue_respawn': (0.5, 0.7),
+        'show_numbers': True,
+        'rack': [
+            # Triángulo de 5 filas hacia el fondo (la última posición queda libre: 14 colores)
+            {'pattern': 'triangle', 'apex': (0.5, 0.35), 'direction': (0, -1), 'rows': 5,
+             'colors': POOL_COLORS},
+        ],
+    },
+    'snooker': {
+        'size': (1200, 600),
+        'ball_radius': 11,
+        'pockets': SIX_POCKETS,
+        'pocket_radius': {'corner': 30, 'side': 28},
+        'cue_spot': (0.15, 0.55),
+        'cue_respawn': (0.15, 0.55),
+        'show_numbers': False,
+        'rack': [
+            # 15 rojas en triángulo detrás de la rosa, hacia la banda derecha
+            {'pattern': 'triangle', 'apex': (0.77, 0.5), 'direction': (1, 0), 'rows': 5,
+             'colors': [SNOOKER_RED] * 15},
+            # Colores en sus puntos
+            {'pattern': 'spots', 'balls': [
+                ((0.2, 0.667), (0, 220, 255)),    # Amarilla
+                ((0.2, 0.333), (0, 150, 0)),      # Verde
+                ((0.2, 0.5), (30, 60, 120)),      # Marrón
+                ((0.5, 0.5), (200, 80, 0)),       # Azul
+                ((0.75, 0.5), (180, 150, 255)),   # Rosa
+                ((0.91, 0.5), (0, 0, 0)),         # Negra
+            ]},
+        ],
+    },
+}
+
+TableSpec = namedtuple('TableSpec', [
+    'name', 'length', 'width', 'ball_radius', 'show_numbers',
+    'pockets',          # [{'pos': (x, y), 'radius': r}] en unidades de mesa
+    'pocket_centers',   # np.ndarray (P, 2) para el chequeo vectorizado
+    'pocket_radii_sq',  # np.ndarray (P,)
+    'cue_spot', 'cue_respawn',
+    'balls',            # [(número, x, y, color)] sin la blanca
+])
+
+
+def _triangle(rack, length, width, radius):
+    """Posiciones de un triángulo de bolas casi tocándose"""
+    apex_x, apex_y = rack['apex'][0] * length, rack['apex'][1] * width
+    dir_x, dir_y = rack['direction']
+    spacing = 2 * radius + 1
+    row_spacing = spacing * math.sqrt(3) / 2
+
+    positions = []
+    for row in range(rack['rows']):
+        for col in range(row + 1):
+            offset = (col - row / 2) * spacing
+            positions.append((
+                apex_x + dir_x * row * row_spacing - dir_y * offset,
+                apex_y + dir_y * row * row_spacing + dir_x * offset,
+            ))
+    return list(zip(positions, rack['colors']))
+
+
+def compile_table(name, config):
+    """Convierte una configuración declarativa en un TableSpec listo para el motor"""
+    length, width = config['size']
+    radius = config['ball_radius']
+
+    pockets = [
+        {'pos': (fx * length, fy * width), 'radius': config['pocket_radius'][kind]}
+        for (fx, fy), kind in config['pockets']
+    ]
+
+    balls = []
+    for rack in config['rack']:
+        if rack['pattern'] == 'triangle':
+            placed = _triangle(rack, length, width, radius)
+        elif rack['pattern'] == 'spots':
+            placed = [((fx * length, fy * width), color) for (fx, fy), color in rack['balls']]
+        else:
+            raise ValueError(f"Patrón de colocación desconocido: {rack['pattern']}")
+        for (x, y), color in placed:
+            balls.append((len(balls) + 1, x, y, color))
+
+    cue_spot = config['cue_spot']
+    cue_respawn = config['cue_respawn']
+    return TableSpec(
+        name=name,
+        length=length,
+        width=width,
+        ball_radius=radius,
+        show_numbers=config['show_numbers'],
+        pockets=pockets,
+        pocket_centers=np.array([pocket['pos'] for pocket in pockets], dtype=np.float64),
+        pocket_radii_sq=np.array([pocket['radius'] ** 2 for pocket in pockets], dtype=np.float64),
+        cue_spot=(cue_spot[0] * length, cue_spot[1] * width),
+        cue_respawn=(cue_respawn[0] * length, cue_respawn[1] * width),
+        balls=balls,
+    )
+
+
+@lru_cache(maxsize=None)
+def load_table(name=DEFAULT_TABLE):
+    """Mesa compilada por nombre (se compila una vez por proceso)"""
+    if name not in TABLES:
+        raise ValueError(f"Mesa desconocida: {name} (disponibles: {', '.join(TABLES)})")
+    return compile_table(name, TABLES[name])
@@ -0,0 +1,17 @@
+"""
+Regresión de la física con pytest: los tiros de la referencia (physics_baseline.json)
+deben cumplir los invariantes y acabar como se grabaron (ver physics_regression.py)
+"""
+import pytest
+
+from physics_regression import BASELINE_SEED, baseline_cases, compare_baseline, load_baseline, run_case
+
+BASELINE = load_baseline()
+
+
+@pytest.mark.parametrize('case', baseline_cases(), ids=lambda case: f"{case.index}-{case.table}-{case.layout}")
+def test_shot(case):
+    failures, frames, _, positions = run_case(case, BASELINE_SEED)
+    assert case.index in BASELINE, "sin referencia: python physics_regression.py --update-baseline"
+    failures += compare_baseline(BASELINE[case.index], frames, positions)
+    assert not failures, '; '.join(failures)
@@ -0,0 +1,229 @@
+"""
+Exportación a vídeo: un hilo aparte codifica los frames que le pasa el juego
+
+El juego copia cada frame en uno de los buffers preasignados y lo encola sin esperar; si el
+codificador va atrasado y no queda ningún buffer libre, el frame se descarta en vez de frenar
+el bucle. Sin ventana, también renderiza grabaciones (replay.py) o partidas de la IA más
+rápido que en tiempo real.
+"""
+import argparse
+import logging
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from game_log import get_logger, log_event, start_logging, stop_logging
+from table_config import TABLES, DEFAULT_TABLE
+
+logger = get_logger('video')
+
+VIDEO_FPS = 30
+VIDEO_QUEUE_SIZE = 8       # Buffers preasignados: frames en vuelo hacia el codificador
+VIDEO_FOURCC = 'mp4v'
+VIDEO_MAX_REPEAT = 30      # En tiempo real, máximo de veces que se repite un frame para rellenar huecos
+TICK_RATE = 60             # Ticks de física por segundo de juego (SIMULATION_DT)
+INSET_MARGIN = 10          # Margen de la miniatura de la cámara en el vídeo
+
+
+class VideoExporter:
+    """Codifica frames a un archivo de vídeo en un hilo aparte"""
+
+    def __init__(self, path, size, fps=VIDEO_FPS, queue_size=VIDEO_QUEUE_SIZE, realtime=True,
+                 fourcc=VIDEO_FOURCC):
+        """
+        Args:
+            path: archivo de salida
+            size: (ancho, alto) del vídeo
+            realtime: True si los frames llegan del bucle del juego: se muestrean al ritmo
+                del vídeo según el reloj. False para renderizar sin ventana: cada frame es uno del vídeo
+        """
+        width, height = size
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+        if not self.writer.isOpened():
+            raise RuntimeError(f"no se pudo crear el vídeo {path} ({fourcc})")
+        self.path = path
+        self.fps = fps
+        self.realtime = realtime
+        self.size = size
+        self.shape = (height, width, 3)
+
+        self._free = queue.Queue()
+        for _ in range(queue_size):
+            self._free.put(np.empty(self.shape, dtype=np.uint8))
+        self._pending = queue.Queue()
+        self._next_slot = None
+        self._owed_slots = 0  # Huecos de vídeo de frames descartados, los cubre el siguiente frame
+
+        self.written = 0
+        self.dropped = 0
+        self.error = None   # Excepción del codificador: a partir de ella no se aceptan frames
+        self._thread = threading.Thread(target=self._encode, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, inset=None, block=False):
+        """
+        Copia el frame (y una miniatura opcional en la esquina inferior derecha) y lo encola.
+
+        Returns:
+            bool: False si se descartó por no haber buffers libres o por haber fallado el codificador
+        """
+        if self.error is not None:
+            return False
+        repeat = 1
+        if self.realtime:
+            now = time.perf_counter()
+            if self._next_slot is None:
+                self._next_slot = now
+            if now < self._next_slot:
+                return True  # Aún no toca otro frame de vídeo (el juego va más rápido)
+            # Si el juego va más lento que el vídeo, el frame se repite para no acelerar la partida
+            slots = int((now - self._next_slot) * self.fps) + 1
+            self._next_slot += slots / self.fps
+            repeat = min(slots + self._owed_slots, VIDEO_MAX_REPEAT)
+
+        try:
+            buffer = self._free.get(block=block)
+        except queue.Empty:
+            self.dropped += 1
+            if self.realtime:
+                self._owed_slots = repeat  # Sin esto, el vídeo perdería el tiempo del frame descartado
+            return False
+        self._owed_slots = 0
+
+        if frame.shape == self.shape:
+            np.copyto(buffer, frame)
+        else:
+            cv2.resize(frame, self.size, dst=buffer, interpolation=cv2.INTER_AREA)
+        if inset is not None:
+            inset_h, inset_w = inset.shape[:2]
+            y = self.shape[0] - inset_h - INSET_MARGIN
+            x = self.shape[1] - inset_w - INSET_MARGIN
+            buffer[y:y + inset_h, x:x + inset_w] = inset
+        self._pending.put((buffer, repeat))
+        return True
+
+    def _encode(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            buffer, repeat = item
+            try:
+                for _ in range(repeat):
+                    self.writer.write(buffer)
+                    self.written += 1
+            except Exception as error:
+                # Se guarda para close(); el buffer se devuelve para despertar a un submit bloqueado
+                self.error = error
+                log_event(logger, 'video_export_error', level=logging.ERROR, path=self.path, error=repr(error))
+                break
+            finally:
+                self._free.put(buffer)
+
+    def close(self):
+        """Termina de codificar lo pendiente y cierra el archivo (relanza el error del codificador)"""
+        self._pending.put(None)
+        self._thread.join()
+        self.writer.release()
+        log_event(logger, 'video_export', path=self.path, frames=self.written, dropped=self.dropped)
+        if self.error is not None:
+            raise self.error
+
+
+def render_replay(replay_path, output, table=None, fps=VIDEO_FPS, start=0, end=None):
+    """
+    Renderiza una grabación a vídeo sin ventana, tan rápido como se dibuje y codifique.
+
+    table: None para usar la mesa guardada en la grabación
+
+    Returns:
+        int: frames escritos
+    """
+    from billiard_game import BilliardGame
+    from replay import ReplayReader
+
+    reader = ReplayReader(replay_path)
+    game = BilliardGame(width=1200, height=800, table=table or reader.table)
+    frame = np.zeros((game.height, game.width, 3), dtype=np.uint8)
+    stride = max(1, round(TICK_RATE / fps))
+    exporter = VideoExporter(output, (game.width, game.height), fps=fps, realtime=False)
+    try:
+        for tick, positions, score in reader.iter_states(start):
+            if end is not None and tick >= end:
+                break
+            if (tick - start) % stride:
+                continue
+            game.set_state(positions)
+            game.score = score
+            if not exporter.submit(game.draw(frame), block=True):
+                break  # El codificador falló: close() relanza el error
+    finally:
+        reader.close()
+        exporter.close()
+    return exporter.written
+
+
+def render_ai_game(output, table=DEFAULT_TABLE, shots=10, fps=VIDEO_FPS):
+    """
+    Juega `shots` tiros de la IA sin ventana, avanzando la física paso a paso, y los graba.
+
+    Returns:
+        int: frames escritos
+    """
+    from billiard_game import BilliardGame
+    from ai_player import AIPlayer
+
+    game = BilliardGame(width=1200, height=800, table=table)
+    ai_player = AIPlayer()
+    frame = np.zeros((game.height, game.width, 3), dtype=np.uint8)
+    stride = max(1, round(TICK_RATE / fps))
+    exporter = VideoExporter(output, (game.width, game.height), fps=fps, realtime=False)
+    tick = 0
+    try:
+        for _ in range(shots):
+            if ai_player.play(game) is None:
+                break
+            while True:
+                game.step_frame()
+                if tick % stride == 0 and not exporter.submit(game.draw(frame), block=True):
+                    return exporter.written  # El codificador falló: close() relanza el error
+                tick += 1
+                if not game.any_ball_moving():
+                    break
+    finally:
+        exporter.close()
+    return exporter.written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta a vídeo una grabación o una partida de la IA, sin ventana")
+    parser.add_argument('output', help="Archivo de vídeo de salida (.mp4)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--replay', metavar='ARCHIVO', help="Grabación hecha con --record")
+    source.add_argument('--ai-shots', type=int, metavar='N', help="Partida de N tiros de la IA")
+    parser.add_argument('--table', default=None, choices=sorted(TABLES),
+                        help=f"Mesa (por defecto {DEFAULT_TABLE}; con --replay, la guardada en la grabación)")
+    parser.add_argument('--fps', type=int, default=VIDEO_FPS)
+    parser.add_argument('--start', type=int, default=0, help="Primer tick de la grabación")
+    parser.add_argument('--end', type=int, default=None, help="Tick final de la grabación (excluido)")
+    args = parser.parse_args()
+
+    start_logging(logging.INFO)
+    started = time.perf_counter()
+    if args.replay:
+        frames = render_replay(args.replay, args.output, table=args.table, fps=args.fps,
+                               start=args.start, end=args.end)
+    else:
+        frames = render_ai_game(args.output, table=args.table or DEFAULT_TABLE, shots=args.ai_shots, fps=args.fps)
+    elapsed = time.perf_counter() - started
+    duration = frames / args.fps
+    print(f"{frames} frames ({duration:.1f} s de vídeo) en {elapsed:.1f} s "
+          f"({duration / max(elapsed, 1e-6):.1f}x tiempo real)")
+    stop_logging()
+
+
+if __name__ == "__main__":
+    main()